@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TextFile, GeneratedImage, Prediction
+from .models import TextFile, GeneratedImage, Prediction, FilePrediction
 
 
 @admin.register(TextFile)
@@ -11,11 +11,18 @@ class TextFileAdmin(admin.ModelAdmin):
 
 @admin.register(GeneratedImage)
 class GeneratedImageAdmin(admin.ModelAdmin):
-    list_display = ['id', 'created_at']
-    list_filter = ['created_at']
+    list_display = ['id', 'phi_index', 'created_at']
+    list_filter = ['created_at', 'phi_index']
 
 
 @admin.register(Prediction)
 class PredictionAdmin(admin.ModelAdmin):
-    list_display = ['id', 'image', 'confidence', 'created_at']
-    list_filter = ['created_at']
+    list_display = ['id', 'image', 'confidence', 'model_version', 'created_at']
+    list_filter = ['created_at', 'model_version']
+
+
+@admin.register(FilePrediction)
+class FilePredictionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'text_file', 'phi1', 'phi2', 'phi3', 'phi4', 'phi5', 'model_version', 'created_at']
+    list_filter = ['created_at', 'model_version', 'phi1', 'phi2', 'phi3', 'phi4', 'phi5']
+    search_fields = ['text_file__filename', 'file_hash']
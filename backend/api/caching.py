@@ -0,0 +1,105 @@
+"""
+List caching
+Table version stamps, bumped after writes, let list endpoints answer
+conditional GETs with 304 and reuse serialized payloads until a table changes
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import TableVersion
+
+# Serialized lists are keyed by version, so the timeout only bounds memory
+LIST_CACHE_TIMEOUT = 300
+
+
+def bump_table_version(label):
+    """Increment the version stamp of one table"""
+    now = timezone.now()
+    updated = TableVersion.objects.filter(name=label).update(version=F('version') + 1, updated_at=now)
+    if not updated:
+        try:
+            with transaction.atomic():
+                TableVersion.objects.create(name=label, version=1, updated_at=now)
+        except IntegrityError:
+            # Another writer created it first
+            TableVersion.objects.filter(name=label).update(version=F('version') + 1, updated_at=now)
+
+
+def table_changed(model):
+    """
+    Mark a model's table as changed
+
+    The stamp is bumped once per table when the current transaction commits
+    (immediately outside a transaction), so a bulk delete costs one update.
+    Duplicates are found among the transaction's own pending on_commit
+    callbacks, which Django discards on rollback, so a rolled back write
+    leaves nothing behind that would suppress later bumps.
+    """
+    label = model._meta.label
+    connection = transaction.get_connection()
+
+    if connection.in_atomic_block:
+        for _, func, _ in connection.run_on_commit:
+            if getattr(func, 'table_label', None) == label:
+                return
+
+    def flush():
+        bump_table_version(label)
+
+    flush.table_label = label
+    transaction.on_commit(flush, robust=True)
+
+
+def table_stamp(models):
+    """
+    Current stamp of a set of tables
+
+    Returns:
+        tuple: (version string, last modified datetime or None)
+    """
+    labels = sorted(model._meta.label for model in models)
+    rows = {row.name: row for row in TableVersion.objects.filter(name__in=labels)}
+    version = '.'.join(str(rows[label].version) if label in rows else '0' for label in labels)
+    last_modified = max((row.updated_at for row in rows.values()), default=None)
+    return version, last_modified
+
+
+def cached_list_response(request, name, models, build):
+    """
+    Respond to a list GET from the cache, or with 304 if the client is current
+
+    Args:
+        request: The incoming request
+        name: Cache namespace for this list, e.g. 'files'
+        models: Models whose tables the list is built from
+        build: Callable returning the serialized list; only called on a cache miss
+
+    Returns:
+        Response (or HttpResponseNotModified) with ETag and Last-Modified headers
+    """
+    version, last_modified = table_stamp(models)
+    etag = '"%s"' % hashlib.md5(f'{name}:{version}'.encode()).hexdigest()
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if response is None:
+        key = f'api:list:{name}:{version}'
+        data = cache.get(key)
+        if data is None:
+            data = build()
+            cache.set(key, data, LIST_CACHE_TIMEOUT)
+        response = Response(data)
+
+    response['ETag'] = etag
+    if last_modified_ts is not None:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    # Let browsers keep the list but revalidate it on every use
+    response['Cache-Control'] = 'no-cache'
+    return response
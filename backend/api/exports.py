@@ -0,0 +1,89 @@
+"""
+Result exports
+Shared table layout used by the ZIP download and the offline batch commands
+"""
+from .phi import PHI_INDICES
+
+# Category mapping
+CATEGORIES = {0: 'Circulation', 1: 'Libration/Circulation', 2: 'Libration'}
+
+
+def category_label(value):
+    """Map a predicted class to its display name (empty if not predicted)"""
+    if value is None:
+        return ''
+    return CATEGORIES.get(value, str(value))
+
+
+def result_headers(phi_indices=PHI_INDICES):
+    """Table headers for the given Φ columns"""
+    return ['File Name'] + [f'Φ{phi_index}' for phi_index in phi_indices]
+
+
+def phi_columns_in(predictions):
+    """Φ columns present in any of the prediction dicts, in order"""
+    return tuple(
+        phi_index for phi_index in PHI_INDICES
+        if any(f'phi{phi_index}' in pred for pred in predictions)
+    ) or PHI_INDICES
+
+
+def result_row(pred, phi_indices=PHI_INDICES):
+    """
+    Build one table row from a prediction dict
+
+    Args:
+        pred: {'filename': ..., 'phi1': 0, ..., 'phi5': 2}
+        phi_indices: Which Φ columns to include (default: all five)
+
+    Returns:
+        list: [filename, Φ label, ...]
+    """
+    row = [pred.get('filename', '')]
+    for phi_index in phi_indices:
+        row.append(category_label(pred.get(f'phi{phi_index}')))
+    return row
+
+
+def build_results_workbook(rows, phi_indices=PHI_INDICES):
+    """
+    Build the "Prediction Results" workbook
+
+    Args:
+        rows: Iterable of rows as returned by result_row()
+        phi_indices: Which Φ columns the rows contain (default: all five)
+
+    Returns:
+        openpyxl Workbook
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    headers = result_headers(phi_indices)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Prediction Results"
+
+    # Style the header
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+
+    # Write headers
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+
+    # Write data, tracking column widths as we go
+    widths = [len(header) for header in headers]
+    for row_idx, row in enumerate(rows, 2):
+        for col, value in enumerate(row, 1):
+            ws.cell(row=row_idx, column=col, value=value)
+            widths[col - 1] = max(widths[col - 1], len(str(value)))
+
+    # Adjust column widths
+    for col, width in enumerate(widths, 1):
+        ws.column_dimensions[ws.cell(row=1, column=col).column_letter].width = width + 2
+
+    return wb
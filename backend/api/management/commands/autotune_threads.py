@@ -0,0 +1,166 @@
+"""
+CPU budget autotuning
+Benchmarks several splits of the host's cores between web workers, TensorFlow
+and BLAS, and recommends the fastest
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.cpu_budget import budget_env, compute_budget
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark CPU_BUDGET splits. Each candidate runs WEB_WORKERS processes in parallel, '
+        'each rendering and classifying synthetic orbit files like upload_and_predict does, '
+        'and reports the combined files/s.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--web-workers',
+            default=None,
+            help='Comma-separated worker counts to try (default: 1, 2, 4, ... up to the core count)',
+        )
+        parser.add_argument('--files', type=int, default=16, help='Files classified per worker in each trial')
+        parser.add_argument('--batch-size', type=int, default=8, help='Files per model call')
+        # Internal: run one worker of a trial (thread counts come from the environment)
+        parser.add_argument('--trial', help='Run a single benchmark worker using this sync directory')
+
+    def handle(self, *args, **options):
+        if options['files'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--files and --batch-size must be at least 1')
+
+        if options['trial']:
+            self.run_trial(options['trial'], options['files'], options['batch_size'])
+            return
+
+        total_cores = settings.CPU_THREADS['TOTAL_CORES']
+        if options['web_workers']:
+            web_workers = [int(value) for value in options['web_workers'].split(',')]
+        else:
+            web_workers = [1]
+            while web_workers[-1] * 2 <= total_cores:
+                web_workers.append(web_workers[-1] * 2)
+
+        results = []
+        for budget in self.candidates(total_cores, web_workers):
+            label = (
+                f"workers={budget['WEB_WORKERS']} intra={budget['TF_INTRA_OP_THREADS']} "
+                f"inter={budget['TF_INTER_OP_THREADS']} blas={budget['BLAS_THREADS']}"
+            )
+            self.stdout.write(f'Trying {label} ...', ending='')
+            self.stdout.flush()
+            throughput = self.run_candidate(budget, options['files'], options['batch_size'])
+            self.stdout.write(f' {throughput:.2f} files/s')
+            results.append((throughput, label, budget))
+
+        throughput, label, best = max(results, key=lambda result: result[0])
+        self.stdout.write(self.style.SUCCESS(f'Fastest: {label} ({throughput:.2f} files/s)'))
+        self.stdout.write('Recommended settings:')
+        self.stdout.write('CPU_BUDGET = {')
+        for key in ('TOTAL_CORES', 'WEB_WORKERS', 'TF_INTRA_OP_THREADS', 'TF_INTER_OP_THREADS', 'BLAS_THREADS'):
+            self.stdout.write(f"    '{key}': {best[key]},")
+        self.stdout.write("    'RENDER_WORKERS': None,")
+        self.stdout.write('}')
+
+    def candidates(self, total_cores, web_workers):
+        """Budgets to try: a few splits per worker count, plus the unpinned default"""
+        budgets = []
+        for workers in web_workers:
+            cores_per_worker = max(1, total_cores // workers)
+            # What every library picks on its own: all cores, in every worker
+            budgets.append({
+                'TOTAL_CORES': total_cores,
+                'WEB_WORKERS': workers,
+                'TF_INTRA_OP_THREADS': total_cores,
+                'TF_INTER_OP_THREADS': total_cores,
+                'BLAS_THREADS': total_cores,
+                'RENDER_WORKERS': 1,
+            })
+            for intra in sorted({cores_per_worker, max(1, cores_per_worker // 2)}):
+                for inter in sorted({1, min(2, cores_per_worker)}):
+                    budgets.append(compute_budget({
+                        'TOTAL_CORES': total_cores,
+                        'WEB_WORKERS': workers,
+                        'TF_INTRA_OP_THREADS': intra,
+                        'TF_INTER_OP_THREADS': inter,
+                        'BLAS_THREADS': 1,
+                    }))
+
+        # Small core counts make several splits identical
+        unique = {}
+        for budget in budgets:
+            key = tuple(budget[name] for name in (
+                'WEB_WORKERS', 'TF_INTRA_OP_THREADS', 'TF_INTER_OP_THREADS', 'BLAS_THREADS'
+            ))
+            unique.setdefault(key, budget)
+        return list(unique.values())
+
+    def run_candidate(self, budget, files, batch_size):
+        """Run WEB_WORKERS trial processes at once and return their combined files/s"""
+        env = {**os.environ, **budget_env(budget)}
+        manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+
+        with tempfile.TemporaryDirectory() as sync_dir:
+            processes = [
+                subprocess.Popen(
+                    [sys.executable, manage_py, 'autotune_threads', '--trial', sync_dir,
+                     '--files', str(files), '--batch-size', str(batch_size)],
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                )
+                for _ in range(budget['WEB_WORKERS'])
+            ]
+
+            # Start the clock only once every worker has loaded the model
+            while len([name for name in os.listdir(sync_dir) if name.startswith('ready-')]) < len(processes):
+                if any(process.poll() not in (None, 0) for process in processes):
+                    break
+                time.sleep(0.05)
+            open(os.path.join(sync_dir, 'go'), 'w').close()
+
+            outputs = [process.communicate()[0] for process in processes]
+
+        if any(process.returncode != 0 for process in processes):
+            raise CommandError('A benchmark worker failed; see the output above')
+
+        reports = [json.loads(output.strip().splitlines()[-1]) for output in outputs]
+        files_done = sum(report['files'] for report in reports)
+        elapsed = max(report['seconds'] for report in reports)
+        return files_done / elapsed
+
+    def run_trial(self, sync_dir, files, batch_size):
+        """One benchmark worker: warm up, wait for the others, then time the workload"""
+        from api.ml_predictor import predict_batch, render_phi_arrays
+        from api.synthetic import synthetic_orbit_text
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            paths = []
+            for seed in range(files):
+                path = os.path.join(data_dir, f'orbit_{seed}.txt')
+                with open(path, 'w') as f:
+                    f.write(synthetic_orbit_text(seed=seed))
+                paths.append(path)
+
+            # Warm-up: loads the model and initializes TensorFlow's pools
+            predict_batch([render_phi_arrays(paths[0])])
+
+            open(os.path.join(sync_dir, f'ready-{os.getpid()}'), 'w').close()
+            while not os.path.exists(os.path.join(sync_dir, 'go')):
+                time.sleep(0.01)
+
+            start = time.monotonic()
+            for i in range(0, len(paths), batch_size):
+                predict_batch([render_phi_arrays(path) for path in paths[i:i + batch_size]])
+            elapsed = time.monotonic() - start
+
+        self.stdout.write(json.dumps({'files': len(paths), 'seconds': elapsed}))
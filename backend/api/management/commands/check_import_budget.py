@@ -0,0 +1,110 @@
+"""
+Startup import budget
+Measures the import time of a web worker with `python -X importtime` and
+fails when it exceeds STARTUP_IMPORT_BUDGET or loads the ML stack
+"""
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a web worker imports before serving its first request
+STARTUP_CODE = 'import config.wsgi, config.urls'
+
+
+def measure_startup():
+    """
+    Import the app in a fresh interpreter under -X importtime
+
+    Returns:
+        dict: {module: (self microseconds, cumulative microseconds)} for every
+        module imported at startup
+    """
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings', 'ML_PRELOAD': '0'}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise CommandError(f'Importing the app failed:\n{result.stderr[-2000:]}')
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(own), int(cumulative))
+    return modules
+
+
+def import_time_ms(modules):
+    """Total import time of a measure_startup() result, in milliseconds"""
+    return sum(own for own, _ in modules.values()) / 1000
+
+
+def forbidden_imports(modules, forbidden):
+    """
+    Forbidden packages among the imported modules
+
+    Args:
+        modules: measure_startup() result
+        forbidden: Top-level package names, e.g. STARTUP_IMPORT_BUDGET['FORBIDDEN_MODULES']
+
+    Returns:
+        list: The forbidden packages that were imported, sorted
+    """
+    return sorted(
+        name for name in forbidden
+        if any(module == name or module.startswith(name + '.') for module in modules)
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that importing the app (config.wsgi + config.urls) stays within '
+        'STARTUP_IMPORT_BUDGET and does not load the ML stack. Exits with an error otherwise.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to measure (median is used)')
+        parser.add_argument('--max-ms', type=float, default=None, help="Override STARTUP_IMPORT_BUDGET['MAX_MS']")
+        parser.add_argument('--top', type=int, default=10, help='Packages to list by import time')
+
+    def handle(self, *args, **options):
+        budget = settings.STARTUP_IMPORT_BUDGET
+        max_ms = options['max_ms'] if options['max_ms'] is not None else budget['MAX_MS']
+
+        runs = [measure_startup() for _ in range(max(1, options['runs']))]
+        totals = [import_time_ms(modules) for modules in runs]
+        median_ms = statistics.median(totals)
+
+        # Import time per top-level package, from the median run
+        modules = runs[totals.index(sorted(totals)[len(totals) // 2])]
+        packages = defaultdict(int)
+        for name, (own, _) in modules.items():
+            packages[name.split('.')[0]] += own
+
+        self.stdout.write(f'Startup import time: {median_ms:.0f} ms (median of {len(runs)}, budget {max_ms:.0f} ms)')
+        self.stdout.write(f'{len(modules)} modules imported; slowest packages:')
+        for package, own in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:options['top']]:
+            self.stdout.write(f'  {own / 1000:8.1f} ms  {package}')
+
+        forbidden = forbidden_imports(modules, budget['FORBIDDEN_MODULES'])
+
+        problems = []
+        if forbidden:
+            problems.append(f"heavy modules imported at startup: {', '.join(forbidden)}")
+        if median_ms > max_ms:
+            problems.append(f'import time {median_ms:.0f} ms exceeds the budget of {max_ms:.0f} ms')
+        if problems:
+            raise CommandError('; '.join(problems))
+
+        self.stdout.write(self.style.SUCCESS('Within the startup import budget'))
@@ -0,0 +1,353 @@
+"""
+HTTP load test
+Starts the app against the stub model and drives concurrent clients through
+upload-and-predict and download-results, reporting throughput, latency
+percentiles, error rate and server memory over time
+"""
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.synthetic import synthetic_orbit_text
+
+# Distinct synthetic files cycled through by the clients
+PAYLOAD_FILES = 64
+
+
+def free_port():
+    """A TCP port that is free on localhost right now"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def read_rss(pid):
+    """Resident set size of a process in bytes, None if it cannot be read"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def multipart_body(files, fields=()):
+    """
+    Encode files as multipart/form-data
+
+    Args:
+        files: [(filename, bytes)], sent as the "files" field
+        fields: [(name, value)] plain form fields
+
+    Returns:
+        tuple: (body bytes, Content-Type header)
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for filename, content in files:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="files"; filename="{filename}"\r\n'
+            f'Content-Type: text/plain\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the HTTP API. Starts `runserver` with the stub model, a temporary database '
+        'and a temporary MEDIA_ROOT (or targets --url), then runs concurrent clients that upload '
+        'synthetic orbit files and download the results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=4, help='Concurrent clients')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--files-per-request', type=int, default=1, help='Files per upload-and-predict request')
+        parser.add_argument('--rows', type=int, default=2000, help='Rows per synthetic orbit file')
+        parser.add_argument('--phis', default=None, help='Φ subset sent with each upload, e.g. "1,3"')
+        parser.add_argument('--no-download', action='store_true', help='Only call upload-and-predict')
+        parser.add_argument('--model-delay-ms', type=float, default=0, help='Simulated inference time per file')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between progress lines')
+        parser.add_argument('--timeout', type=float, default=120, help='Per-request timeout in seconds')
+        parser.add_argument('--url', default=None, help='Test an already running server instead, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--pid', type=int, default=None, help='Server process to sample RSS from (with --url)')
+        parser.add_argument('--json', dest='json_path', default=None, help='Also write the report to this file')
+        parser.add_argument('--keep', action='store_true', help='Keep the temporary database, media and server log')
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['files_per_request'] < 1 or options['duration'] <= 0:
+            raise CommandError('--clients and --files-per-request must be at least 1, --duration positive')
+
+        self.options = options
+        work_dir = None
+        server = None
+
+        try:
+            if options['url']:
+                base_url = options['url'].rstrip('/')
+                pid = options['pid']
+            else:
+                work_dir = tempfile.mkdtemp(prefix='orc-loadtest-')
+                server, base_url = self.start_server(work_dir)
+                pid = server.pid
+
+            self.wait_until_ready(base_url, server)
+            payloads = self.build_payloads()
+
+            # First request loads the model and plotting libraries; keep it out of the numbers
+            self.stdout.write('Warming up ...')
+            self.run_request(base_url, payloads[0], download=False)
+
+            report = self.run_load(base_url, payloads, pid)
+            self.print_report(report)
+
+            if options['json_path']:
+                with open(options['json_path'], 'w') as f:
+                    json.dump(report, f, indent=2)
+                self.stdout.write(f"Report written to {options['json_path']}")
+        finally:
+            if server is not None:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+            if work_dir:
+                if options['keep']:
+                    self.stdout.write(f'Kept database, media and server.log in {work_dir}')
+                else:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+    def start_server(self, work_dir):
+        """Migrate a fresh database and start runserver with the stub model"""
+        manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+        env = {
+            **os.environ,
+            'ML_STUB_MODEL': '1',
+            'ML_STUB_MODEL_DELAY_MS': str(self.options['model_delay_ms']),
+            'DJANGO_DB_PATH': os.path.join(work_dir, 'db.sqlite3'),
+            'DJANGO_MEDIA_ROOT': os.path.join(work_dir, 'media'),
+            'PYTHONUNBUFFERED': '1',
+        }
+
+        self.stdout.write(f'Preparing database in {work_dir} ...')
+        subprocess.run([sys.executable, manage_py, 'migrate', '--noinput', '-v0'], env=env, check=True)
+
+        port = free_port()
+        log = open(os.path.join(work_dir, 'server.log'), 'w')
+        server = subprocess.Popen(
+            [sys.executable, manage_py, 'runserver', f'127.0.0.1:{port}', '--noreload'],
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        log.close()
+        self.stdout.write(f'Started server (pid {server.pid}) on port {port}')
+        return server, f'http://127.0.0.1:{port}'
+
+    def wait_until_ready(self, base_url, server, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server is not None and server.poll() is not None:
+                raise CommandError('Server exited during startup (run with --keep to see server.log)')
+            try:
+                with urllib.request.urlopen(f'{base_url}/api/files/', timeout=5):
+                    return
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        raise CommandError(f'Server at {base_url} did not respond within {timeout} seconds')
+
+    def build_payloads(self):
+        """Pre-encode upload bodies so clients spend no time generating data"""
+        fields = [('phis', self.options['phis'])] if self.options['phis'] else []
+        texts = [
+            synthetic_orbit_text(rows=self.options['rows'], seed=seed).encode()
+            for seed in range(PAYLOAD_FILES)
+        ]
+        payloads = []
+        for start in range(0, PAYLOAD_FILES, self.options['files_per_request']):
+            files = [
+                (f'orbit_{(start + i) % PAYLOAD_FILES:03d}.txt', texts[(start + i) % PAYLOAD_FILES])
+                for i in range(self.options['files_per_request'])
+            ]
+            payloads.append(multipart_body(files, fields))
+        return payloads
+
+    def request(self, url, body, content_type):
+        """POST and read the whole response; returns (status, body)"""
+        req = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+        try:
+            with urllib.request.urlopen(req, timeout=self.options['timeout']) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def run_request(self, base_url, payload, download):
+        """
+        One client iteration: upload-and-predict, then optionally download-results
+
+        Returns:
+            list: [(endpoint, seconds, error or None)]
+        """
+        samples = []
+        started = time.perf_counter()
+        try:
+            status, content = self.request(f'{base_url}/api/upload-and-predict/', *payload)
+            error = None if status == 200 else f'HTTP {status}'
+        except Exception as e:
+            content, error = None, type(e).__name__
+        samples.append(('upload-and-predict', time.perf_counter() - started, error))
+
+        if download and error is None:
+            file_ids = [prediction['id'] for prediction in json.loads(content)['predictions']]
+            started = time.perf_counter()
+            try:
+                status, _ = self.request(
+                    f'{base_url}/api/download-results/',
+                    json.dumps({'file_ids': file_ids}).encode(),
+                    'application/json',
+                )
+                error = None if status == 200 else f'HTTP {status}'
+            except Exception as e:
+                error = type(e).__name__
+            samples.append(('download-results', time.perf_counter() - started, error))
+
+        return samples
+
+    def run_load(self, base_url, payloads, pid):
+        options = self.options
+        download = not options['no_download']
+        samples = []  # (endpoint, finished at, seconds, error)
+        lock = threading.Lock()
+        stop = threading.Event()
+        begin = time.perf_counter()
+
+        def client(index):
+            i = index
+            while not stop.is_set():
+                for endpoint, seconds, error in self.run_request(base_url, payloads[i % len(payloads)], download):
+                    with lock:
+                        samples.append((endpoint, time.perf_counter() - begin, seconds, error))
+                i += options['clients']
+
+        threads = [
+            threading.Thread(target=client, args=(index,), name=f'loadtest-client-{index}', daemon=True)
+            for index in range(options['clients'])
+        ]
+        self.stdout.write(
+            f"Running {options['clients']} clients for {options['duration']:g}s, "
+            f"{options['files_per_request']} file(s) per upload ..."
+        )
+        for thread in threads:
+            thread.start()
+
+        timeline = []
+        uploads_seen = 0
+        while True:
+            elapsed = time.perf_counter() - begin
+            if elapsed >= options['duration']:
+                break
+            time.sleep(min(options['interval'], options['duration'] - elapsed))
+            elapsed = time.perf_counter() - begin
+
+            with lock:
+                uploads = sum(1 for sample in samples if sample[0] == 'upload-and-predict')
+                errors = sum(1 for sample in samples if sample[3])
+            rss = read_rss(pid) if pid else None
+            interval_files = (uploads - uploads_seen) * options['files_per_request']
+            interval_seconds = elapsed - (timeline[-1]['t'] if timeline else 0)
+            uploads_seen = uploads
+            timeline.append({
+                't': round(elapsed, 2),
+                'files_per_second': round(interval_files / interval_seconds, 2),
+                'errors': errors,
+                'rss_bytes': rss,
+            })
+            rss_text = f'{rss / 2 ** 20:.0f} MiB' if rss else 'n/a'
+            self.stdout.write(
+                f"  t={elapsed:6.1f}s  {interval_files / interval_seconds:7.2f} files/s  "
+                f"errors={errors}  rss={rss_text}"
+            )
+
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=options['timeout'])
+        wall = time.perf_counter() - begin
+
+        endpoints = {}
+        for name in ('upload-and-predict', 'download-results'):
+            rows = [sample for sample in samples if sample[0] == name]
+            if not rows:
+                continue
+            latencies = np.array([sample[2] for sample in rows]) * 1000
+            errors = Counter(sample[3] for sample in rows if sample[3])
+            ok = len(rows) - sum(errors.values())
+            endpoints[name] = {
+                'requests': len(rows),
+                'errors': dict(errors),
+                'error_rate': round(sum(errors.values()) / len(rows), 4),
+                'requests_per_second': round(ok / wall, 2),
+                'latency_ms': {
+                    'p50': round(float(np.percentile(latencies, 50)), 1),
+                    'p90': round(float(np.percentile(latencies, 90)), 1),
+                    'p99': round(float(np.percentile(latencies, 99)), 1),
+                    'max': round(float(latencies.max()), 1),
+                },
+            }
+
+        uploads_ok = endpoints.get('upload-and-predict', {}).get('requests', 0) - sum(
+            endpoints.get('upload-and-predict', {}).get('errors', {}).values()
+        )
+        rss_values = [point['rss_bytes'] for point in timeline if point['rss_bytes']]
+        return {
+            'clients': options['clients'],
+            'files_per_request': options['files_per_request'],
+            'seconds': round(wall, 2),
+            'files_per_second': round(uploads_ok * options['files_per_request'] / wall, 2),
+            'endpoints': endpoints,
+            'rss_peak_bytes': max(rss_values) if rss_values else None,
+            'timeline': timeline,
+        }
+
+    def print_report(self, report):
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['files_per_second']:.2f} files/s over {report['seconds']:.1f}s "
+            f"with {report['clients']} clients"
+        ))
+        for name, stats in report['endpoints'].items():
+            latency = stats['latency_ms']
+            self.stdout.write(
+                f"{name:20s} {stats['requests']:6d} requests  {stats['requests_per_second']:7.2f} req/s  "
+                f"p50={latency['p50']:.0f}ms p90={latency['p90']:.0f}ms p99={latency['p99']:.0f}ms "
+                f"max={latency['max']:.0f}ms  errors={stats['error_rate']:.2%}"
+            )
+            for error, count in stats['errors'].items():
+                self.stdout.write(f'    {error}: {count}')
+        rss_values = [point['rss_bytes'] for point in report['timeline'] if point['rss_bytes']]
+        if rss_values:
+            self.stdout.write(
+                f"Server RSS: {rss_values[0] / 2 ** 20:.0f} MiB -> {rss_values[-1] / 2 ** 20:.0f} MiB "
+                f"(peak {report['rss_peak_bytes'] / 2 ** 20:.0f} MiB)"
+            )
@@ -0,0 +1,53 @@
+"""
+Model registry management
+Lists, registers and activates model versions
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ml_predictor import REGISTRY
+
+
+class Command(BaseCommand):
+    help = (
+        'Manage versioned models. Running web processes pick up a newly activated '
+        'version within MODEL_REGISTRY_POLL_SECONDS and swap it in once it is loaded.'
+    )
+
+    def add_arguments(self, parser):
+        subcommands = parser.add_subparsers(dest='action', required=True)
+
+        subcommands.add_parser('list', help='List versions and show the active one')
+
+        register = subcommands.add_parser('register', help='Copy a model file into the registry')
+        register.add_argument('path', help='Path to a .keras model file')
+        register.add_argument('version', help='Version name, e.g. v3')
+        register.add_argument('--activate', action='store_true', help='Also make it the active version')
+
+        activate = subcommands.add_parser('activate', help='Make a version active')
+        activate.add_argument('version')
+
+    def handle(self, *args, **options):
+        action = options['action']
+
+        if action == 'register':
+            try:
+                path = REGISTRY.register(options['path'], options['version'])
+            except (ValueError, FileNotFoundError) as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f"Registered {options['version']} at {path}"))
+
+        if action == 'activate' or (action == 'register' and options['activate']):
+            version = options['version']
+            if version not in REGISTRY.versions():
+                raise CommandError(f'Unknown model version: {version}')
+            REGISTRY.set_configured_version(version)
+            self.stdout.write(self.style.SUCCESS(f'Activated {version}'))
+
+        if action == 'list':
+            configured = REGISTRY.configured_version()
+            versions = REGISTRY.versions()
+            if not versions:
+                self.stdout.write('No model versions found')
+            for version in versions:
+                marker = '*' if version == configured else ' '
+                self.stdout.write(f'{marker} {version}  {REGISTRY.path_for(version)}')
@@ -0,0 +1,197 @@
+"""
+Offline batch prediction
+Walks a directory of orbit files and classifies them without going through HTTP
+"""
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exports import build_results_workbook, result_headers, result_row
+from api.ml_predictor import predict_batch, render_phi_arrays
+from api.phi import parse_phi_indices
+
+
+class Command(BaseCommand):
+    help = (
+        'Classify every .txt orbit file under a directory. Results are appended '
+        'to a CSV after each batch, so an interrupted run resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Directory with orbit .txt files (searched recursively)')
+        parser.add_argument(
+            '--output',
+            help='CSV file for the results (default: <path>/predictions.csv). '
+                 'It doubles as the checkpoint: files already listed in it are skipped.',
+        )
+        parser.add_argument('--batch-size', type=int, default=32, help='Files per model call')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.CPU_THREADS['RENDER_WORKERS'],
+            help='Render processes (1 renders in this process; default: RENDER_WORKERS from the CPU budget)',
+        )
+        parser.add_argument(
+            '--phis',
+            help='Comma-separated Φ columns to classify, e.g. "1,3" (default: all five)',
+        )
+        parser.add_argument('--xlsx', action='store_true', help='Also write an .xlsx next to the CSV when done')
+        parser.add_argument('--restart', action='store_true', help='Ignore the existing CSV and start over')
+
+    def handle(self, *args, **options):
+        root = os.path.abspath(options['path'])
+        if not os.path.isdir(root):
+            raise CommandError(f'Not a directory: {root}')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be at least 1')
+        try:
+            phi_indices = parse_phi_indices(options['phis'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = os.path.abspath(options['output'] or os.path.join(root, 'predictions.csv'))
+        if options['restart'] and os.path.exists(output):
+            os.remove(output)
+
+        done = self.load_checkpoint(output, result_headers(phi_indices))
+        pending = [name for name in self.find_files(root) if name not in done]
+        self.stdout.write(f'{len(done)} files already done, {len(pending)} to process')
+
+        if pending:
+            self.process(root, pending, output, phi_indices, options['batch_size'], options['workers'])
+
+        if options['xlsx']:
+            xlsx_path = os.path.splitext(output)[0] + '.xlsx'
+            with open(output, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))[1:]
+            build_results_workbook(rows, phi_indices).save(xlsx_path)
+            self.stdout.write(f'Wrote {xlsx_path}')
+
+    def find_files(self, root):
+        """Relative paths of all .txt files under root, in a stable order"""
+        names = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith('.txt'):
+                    full_path = os.path.join(dirpath, filename)
+                    names.append(os.path.relpath(full_path, root).replace(os.sep, '/'))
+        return names
+
+    def load_checkpoint(self, output, headers):
+        """
+        Read the file names already written to the output CSV
+
+        A run killed mid-write can leave a truncated last row; such rows are
+        dropped and the CSV rewritten so those files are processed again.
+        """
+        if not os.path.exists(output):
+            return set()
+
+        with open(output, newline='', encoding='utf-8') as f:
+            content = f.read()
+        rows = list(csv.reader(content.splitlines()))
+        if rows and not content.endswith('\n'):
+            rows.pop()
+        if rows and rows[0] != headers and rows[0][:1] == ['File Name']:
+            raise CommandError(
+                f'{output} has columns {rows[0][1:]}, not {headers[1:]}; '
+                'use --restart or a different --output'
+            )
+        complete = [row for row in rows[1:] if len(row) == len(headers)]
+
+        if not rows or rows[0] != headers or len(complete) != len(rows) - 1 \
+                or not content.endswith('\n'):
+            with open(output, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                writer.writerows(complete)
+
+        return {row[0] for row in complete}
+
+    def process(self, root, pending, output, phi_indices, batch_size, workers):
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup) if workers > 1 else None
+
+        def render_or_error(path):
+            try:
+                return render_phi_arrays(path, phi_indices)
+            except ValueError as e:
+                return e
+
+        def render(batch):
+            paths = [os.path.join(root, name) for name in batch]
+            if executor is None:
+                return [render_or_error(path) for path in paths]
+            return [executor.submit(render_phi_arrays, path, phi_indices) for path in paths]
+
+        def collect(rendered):
+            """Rendered arrays per file, or the ValueError for files that could not be read"""
+            if executor is None:
+                return rendered
+            results = []
+            for future in rendered:
+                try:
+                    results.append(future.result())
+                except ValueError as e:
+                    results.append(e)
+            return results
+
+        start = time.monotonic()
+        processed = 0
+        failed = 0
+        is_new = not os.path.exists(output)
+
+        try:
+            with open(output, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if is_new:
+                    writer.writerow(result_headers(phi_indices))
+
+                # Render the next batch in the pool while the model runs on the current one
+                upcoming = render(batches[0])
+                for index, batch in enumerate(batches):
+                    rendered = collect(upcoming)
+                    if index + 1 < len(batches):
+                        upcoming = render(batches[index + 1])
+
+                    # Unreadable files get no row, so a later run tries them again
+                    readable = []
+                    for name, arrays in zip(batch, rendered):
+                        if isinstance(arrays, ValueError):
+                            failed += 1
+                            self.stderr.write(f'Skipping {name}: {arrays}')
+                        else:
+                            readable.append((name, arrays))
+
+                    if readable:
+                        predictions = predict_batch([arrays for _, arrays in readable], phi_indices)
+                        writer.writerows(
+                            result_row({'filename': name, **pred}, phi_indices)
+                            for (name, _), pred in zip(readable, predictions)
+                        )
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                    processed += len(batch)
+                    elapsed = time.monotonic() - start
+                    self.stdout.write(
+                        f'{processed}/{len(pending)} files '
+                        f'({processed / elapsed:.2f} files/s)'
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} files in {elapsed:.1f}s '
+            f'({processed / elapsed:.2f} files/s) -> {output}'
+        ))
+        if failed:
+            self.stderr.write(f'{failed} files could not be read and have no predictions')
@@ -0,0 +1,65 @@
+"""
+Storage sweep
+Deletes old uploads and their generated artifacts according to the retention policy
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.storage import get_retention, media_usage, sweep
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(value):
+    """Parse a byte count such as "500000", "200M" or "10G" """
+    value = value.strip().upper().removesuffix('B')
+    multiplier = 1
+    if value[-1:] in SIZE_SUFFIXES:
+        multiplier = SIZE_SUFFIXES[value[-1]]
+        value = value[:-1]
+    try:
+        return int(float(value) * multiplier)
+    except ValueError:
+        raise CommandError(f'Invalid size: {value!r}')
+
+
+def format_size(num_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024:
+            return f'{num_bytes:.1f} {unit}'
+        num_bytes /= 1024
+    return f'{num_bytes:.1f} TB'
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete uploaded files, generated images and predictions that fall outside '
+        'the retention policy (STORAGE_RETENTION in settings, overridable here).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=float, help='Delete uploads older than this many days')
+        parser.add_argument('--max-bytes', help='Then delete the oldest uploads until media usage is below this, e.g. 10G')
+        parser.add_argument('--batch-size', type=int, help='Text files deleted per transaction')
+
+    def handle(self, *args, **options):
+        retention = get_retention()
+        max_age_days = options['max_age_days'] if options['max_age_days'] is not None else retention['MAX_AGE_DAYS']
+        max_bytes = parse_size(options['max_bytes']) if options['max_bytes'] else retention['MAX_BYTES']
+        batch_size = options['batch_size'] or retention['BATCH_SIZE']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if max_age_days is None and max_bytes is None:
+            self.stdout.write('No retention limit configured; only orphaned images will be removed')
+
+        start = time.monotonic()
+        totals = sweep(max_age_days=max_age_days, max_bytes=max_bytes, batch_size=batch_size)
+        elapsed = time.monotonic() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {totals['files']} files and {totals['images']} images, "
+            f"reclaimed {format_size(totals['bytes'])} in {elapsed:.1f}s"
+        ))
+        self.stdout.write(f'Media usage now {format_size(media_usage())}')
@@ -0,0 +1,189 @@
+"""
+Stored Φ images
+Saves rendered Φ plots with thumbnails, and serves stored media files with
+long-lived caching, Range requests and optional front-proxy offload
+"""
+import io
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .caching import table_changed
+from .models import GeneratedImage
+
+# Stored files never change (new renders get new names), so clients may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def encode_png(img):
+    """Encode a PIL image as PNG file content"""
+    buf = io.BytesIO()
+    # optimize=True tries every filter for ~15% smaller files at 5x the encode time
+    img.save(buf, format='PNG')
+    return ContentFile(buf.getvalue())
+
+
+def store_phi_images(text_file, images):
+    """
+    Save rendered Φ images and their thumbnails for a text file
+
+    Args:
+        text_file: The TextFile the images were rendered from
+        images: {phi_index: PIL Image}
+
+    Returns:
+        list: The created GeneratedImage rows
+    """
+    from PIL import Image
+
+    size = getattr(settings, 'THUMBNAIL_SIZE', 64)
+    # Named by id, not by the uploaded file name, so stored paths are always ASCII
+    base_name = text_file.id
+
+    generated = []
+    for phi_index, img in images.items():
+        # Plots are black on white, so greyscale thumbnails lose nothing and compress better
+        thumb = img.convert('L')
+        thumb.thumbnail((size, size), Image.Resampling.LANCZOS)
+        generated.append(GeneratedImage(
+            phi_index=phi_index,
+            image=default_storage.save(f'generated_images/{base_name}_phi{phi_index}.png', encode_png(img)),
+            thumbnail=default_storage.save(f'thumbnails/{base_name}_phi{phi_index}.png', encode_png(thumb)),
+        ))
+
+    generated = GeneratedImage.objects.bulk_create(generated)
+    GeneratedImage.text_files.through.objects.bulk_create([
+        GeneratedImage.text_files.through(generatedimage_id=image.id, textfile_id=text_file.id)
+        for image in generated
+    ])
+    table_changed(GeneratedImage)
+    return generated
+
+
+def stored_phi_images(text_file_ids, phi_indices):
+    """
+    Find the stored Φ images of several text files in one query
+
+    Args:
+        text_file_ids: IDs of the TextFile rows
+        phi_indices: Which Φ columns to look up
+
+    Returns:
+        dict: {(text_file_id, phi_index): storage name}, the newest image
+        where a file has several for one Φ
+    """
+    images = (
+        GeneratedImage.objects
+        .filter(text_files__in=text_file_ids, phi_index__in=phi_indices)
+        .order_by('created_at', 'id')
+        .values_list('text_files', 'phi_index', 'image')
+    )
+    return {(text_file_id, phi_index): name for text_file_id, phi_index, name in images if name}
+
+
+def load_stored_image(name):
+    """Open a stored image as an RGB PIL image (raises OSError if it is missing or unreadable)"""
+    from PIL import Image
+
+    with Image.open(default_storage.path(name)) as img:
+        return img.convert('RGB')
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header
+
+    Returns:
+        tuple: (start, end) inclusive, None to send the whole file, or
+        False if the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Malformed or multi-range: ignore it and send the whole file
+        return None
+
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        # Syntactically invalid (RFC 7233 section 2.1): ignore it as well
+        return None
+
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve_media_file(request, name):
+    """
+    Serve a file from MEDIA_ROOT
+
+    Responses carry immutable cache headers and an ETag. With MEDIA_SENDFILE
+    set, the body is left to the front proxy ('x-sendfile' for Apache/lighttpd,
+    'x-accel-redirect' for nginx, which needs an internal location mapping
+    MEDIA_ACCEL_REDIRECT_PREFIX to MEDIA_ROOT); the header value is
+    percent-encoded, as both proxies unescape it. Otherwise single Range
+    requests are answered with 206.
+
+    Args:
+        request: The incoming request
+        name: Storage name of the file (relative to MEDIA_ROOT)
+    """
+    if not name:
+        raise Http404('No file stored')
+    path = default_storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404('File not found')
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        mode = getattr(settings, 'MEDIA_SENDFILE', None)
+        range_header = request.META.get('HTTP_RANGE')
+        byte_range = parse_range(range_header, stat.st_size) if range_header and not mode else None
+
+        # Percent-encoded: Django would MIME-encode a non-ASCII header value,
+        # which the proxies cannot resolve (older uploads have non-ASCII names)
+        if mode == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+        elif mode == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = quote(path)
+        elif byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+        elif byte_range:
+            start, end = byte_range
+            with open(path, 'rb') as f:
+                f.seek(start)
+                response = HttpResponse(f.read(end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='textfile',
+            name='filename',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name='FilePrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phi1', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('phi2', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('phi3', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('phi4', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('phi5', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('text_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='file_prediction', to='api.textfile')),
+            ],
+        ),
+    ]
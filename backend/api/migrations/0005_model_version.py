@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_phi_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileprediction',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='model_version',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
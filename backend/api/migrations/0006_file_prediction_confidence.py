@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_model_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileprediction',
+            name='conf1',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileprediction',
+            name='conf2',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileprediction',
+            name='conf3',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileprediction',
+            name='conf4',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileprediction',
+            name='conf5',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileprediction',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='fileprediction',
+            index=models.Index(fields=['phi1'], name='api_filepred_phi1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileprediction',
+            index=models.Index(fields=['phi2'], name='api_filepred_phi2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileprediction',
+            index=models.Index(fields=['phi3'], name='api_filepred_phi3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileprediction',
+            index=models.Index(fields=['phi4'], name='api_filepred_phi4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileprediction',
+            index=models.Index(fields=['phi5'], name='api_filepred_phi5_idx'),
+        ),
+    ]
@@ -3,20 +3,84 @@ ML Model Predictor
 Loads the trained Keras model and makes predictions on generated images
 """
 import os
+import threading
+
 import numpy as np
 from django.conf import settings
-from PIL import Image
 
-# Global model variable (loaded once)
-MODEL = None
+from .model_registry import ModelRegistry
+from .phi import PHI_INDICES
+
+# Legacy single-model location, served as version "best_model_all" when present
 MODEL_PATH = os.path.join(settings.BASE_DIR, 'models', 'best_model_all.keras')
 
+# One 224x224 RGB image per model input, as uint8 pixels (the model normalizes them, see model_registry)
+INPUT_SHAPE = (224, 224, 3)
+WHITE = 255
+
+# Per-thread input batches, reused across predict_batch() calls
+_buffers = threading.local()
+
+
+def warm_up(model):
+    """Run one prediction so a freshly loaded model is fully initialized before it serves requests"""
+    blank = np.full((1, *INPUT_SHAPE), WHITE, dtype=np.uint8)
+    model.predict_on_batch({f'input_f{phi_index}': blank for phi_index in PHI_INDICES})
+
+
+def batch_buffers(batch_size):
+    """
+    Preallocated uint8 input batches for the calling thread
+    
+    The buffers grow to the largest batch seen and are then reused, so steady
+    state prediction allocates no input arrays.
+    
+    Args:
+        batch_size: Number of files in the batch
+        
+    Returns:
+        Object with .inputs ({phi_index: array (capacity, 224, 224, 3)}) and
+        .blank (white images of the same shape, never written to)
+    """
+    if getattr(_buffers, 'capacity', 0) < batch_size:
+        _buffers.capacity = batch_size
+        _buffers.inputs = {
+            phi_index: np.empty((batch_size, *INPUT_SHAPE), dtype=np.uint8)
+            for phi_index in PHI_INDICES
+        }
+        _buffers.blank = np.full((batch_size, *INPUT_SHAPE), WHITE, dtype=np.uint8)
+    return _buffers
+
+
+# Versioned models (loaded once, hot-swapped on activation)
+if settings.ML_STUB_MODEL:
+    from .stub_model import StubRegistry
+    REGISTRY = StubRegistry(delay_ms=settings.ML_STUB_MODEL_DELAY_MS, warm_up=warm_up)
+else:
+    REGISTRY = ModelRegistry(
+        settings.MODEL_REGISTRY_DIR,
+        legacy_path=MODEL_PATH,
+        warm_up=warm_up,
+        poll_seconds=settings.MODEL_REGISTRY_POLL_SECONDS,
+    )
+
 
 def clear_model():
-    """Clear the cached model to force reload"""
-    global MODEL
-    MODEL = None
-    print("Model cache cleared")
+    """Reload the configured model version in the background; the current one serves until it is ready"""
+    REGISTRY.reload()
+    print("Model reload scheduled")
+
+
+def get_model():
+    """
+    Get the active model
+    Returns a (version, model) pair; use the same pair for a whole batch
+    """
+    try:
+        return REGISTRY.current()
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        raise
 
 
 def load_model():
@@ -24,93 +88,132 @@ def load_model():
     Load the Keras model (only once)
     Returns the loaded model
     """
-    global MODEL
-    
-    if MODEL is None:
-        try:
-            import tensorflow as tf
-            print(f"Loading model from: {MODEL_PATH}")
-            
-            # Check if file exists
-            if not os.path.exists(MODEL_PATH):
-                raise FileNotFoundError(f"Model file not found at: {MODEL_PATH}")
-            
-            MODEL = tf.keras.models.load_model(MODEL_PATH)
-            print("Model loaded successfully!")
-            print(f"Model inputs: {MODEL.input_names if hasattr(MODEL, 'input_names') else 'N/A'}")
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            raise
-    
-    return MODEL
-
-
-def predict_from_images(text_file_path):
+    return get_model()[1]
+
+
+def images_to_arrays(images):
+    """
+    Convert rendered Φ images to pixel arrays
+    
+    Args:
+        images: {phi_index: PIL Image (224x224 RGB)}
+        
+    Returns:
+        dict: {phi_index: uint8 array of shape (224, 224, 3)}
+    """
+    return {phi_index: np.asarray(img, dtype=np.uint8) for phi_index, img in images.items()}
+
+
+def render_phi_arrays(text_file_path, phi_indices=PHI_INDICES):
+    """
+    Render the requested Φ scatter plots for one text file
+    
+    Args:
+        text_file_path: Path to the text file with data
+        phi_indices: Which Φ columns to render (default: all five)
+        
+    Returns:
+        dict: {phi_index: uint8 array of shape (224, 224, 3)}
+    
+    Raises:
+        ValueError: If the file cannot be read or plotted
+    """
+    from .rendering import generate_scatter_plot_images
+    
+    return images_to_arrays(generate_scatter_plot_images(text_file_path, phi_indices))
+
+
+def predict_batch(rendered, phi_indices=PHI_INDICES):
+    """
+    Run the model once on a batch of rendered files
+    
+    Pixels are copied straight into this thread's preallocated uint8 batch
+    buffers; normalization happens inside the model. Model inputs for Φ
+    columns outside phi_indices are fed white images, and their output
+    heads are dropped.
+    
+    Args:
+        rendered: One {phi_index: PIL Image or uint8 array} per file, e.g.
+            render_phi_arrays() results
+        phi_indices: Which Φ predictions to return (default: all five)
+        
+    Returns:
+        list: One predictions dict per file, in input order: the class and its
+        probability per Φ, and the model version
+        Example: [{'phi1': 0, 'conf1': 0.97, 'phi3': 2, 'conf3': 0.88, 'model_version': 'v2'}, ...]
+        for phi_indices=(1, 3)
+    """
+    model_version, model = get_model()
+    batch_size = len(rendered)
+    
+    # Every model input gets a (N, 224, 224, 3) uint8 view of a reused buffer
+    buffers = batch_buffers(batch_size)
+    inputs = {}
+    for phi_index in PHI_INDICES:
+        if phi_index in phi_indices:
+            batch = buffers.inputs[phi_index][:batch_size]
+            for row, images in enumerate(rendered):
+                batch[row] = images[phi_index]
+        else:
+            batch = buffers.blank[:batch_size]
+        inputs[f'input_f{phi_index}'] = batch
+    
+    # predict_on_batch skips the per-call dataset setup of predict()
+    preds = model.predict_on_batch(inputs)
+    classes = {
+        phi_index: np.argmax(preds[phi_index - 1], axis=1)
+        for phi_index in phi_indices
+    }
+    confidences = {
+        phi_index: np.max(preds[phi_index - 1], axis=1)
+        for phi_index in phi_indices
+    }
+    
+    results = []
+    for row in range(batch_size):
+        result = {}
+        for phi_index in phi_indices:
+            result[f'phi{phi_index}'] = int(classes[phi_index][row])
+            result[f'conf{phi_index}'] = round(float(confidences[phi_index][row]), 4)
+        result['model_version'] = model_version
+        results.append(result)
+    return results
+
+
+def predict_from_images(text_file_path, phi_indices=PHI_INDICES, images=None):
     """
     Generate images from text file and run ML predictions
     
     Args:
         text_file_path: Path to the uploaded text file
+        phi_indices: Which Φ columns to render and predict (default: all five)
+        images: Already rendered {phi_index: PIL Image}; rendered here if None
         
     Returns:
-        dict: Predictions for each Φ
-        Example: {'phi1': 0, 'phi2': 1, 'phi3': 2, 'phi4': 0, 'phi5': 1}
+        dict: Class and probability for each requested Φ, and the model version
+        that made them
+        Example: {'phi1': 0, 'conf1': 0.97, ..., 'phi5': 1, 'conf5': 0.91, 'model_version': 'v2'}
+    
+    Raises:
+        ValueError: If the file cannot be read or plotted
+        Exception: Whatever the model raises if inference fails
         
     Prediction values:
         0 = Circulation
         1 = Circulation/Libration
         2 = Libration
     """
-    from .views import generate_scatter_plot_image
-    
     # Load model
-    model = load_model()
+    load_model()
     
-    predictions = {}
+    # Generate the requested images and predict them as a batch of one.
+    # Errors propagate: a file that cannot be rendered or classified has no
+    # prediction, rather than a made-up class.
+    if images is None:
+        images = render_phi_arrays(text_file_path, phi_indices)
+    predictions = predict_batch([images], phi_indices)[0]
     
-    try:
-        # Generate all 5 images (Φ1 to Φ5)
-        img_f1 = generate_scatter_plot_image(text_file_path, 1)
-        img_f2 = generate_scatter_plot_image(text_file_path, 2)
-        img_f3 = generate_scatter_plot_image(text_file_path, 3)
-        img_f4 = generate_scatter_plot_image(text_file_path, 4)
-        img_f5 = generate_scatter_plot_image(text_file_path, 5)
-        
-        # Convert to arrays and normalize
-        img_f1 = np.expand_dims(np.array(img_f1).astype('float32') / 255.0, axis=0)
-        img_f2 = np.expand_dims(np.array(img_f2).astype('float32') / 255.0, axis=0)
-        img_f3 = np.expand_dims(np.array(img_f3).astype('float32') / 255.0, axis=0)
-        img_f4 = np.expand_dims(np.array(img_f4).astype('float32') / 255.0, axis=0)
-        img_f5 = np.expand_dims(np.array(img_f5).astype('float32') / 255.0, axis=0)
-        
-        # Predict with all 5 images as separate inputs
-        preds = model.predict({
-            'input_f1': img_f1,
-            'input_f2': img_f2,
-            'input_f3': img_f3,
-            'input_f4': img_f4,
-            'input_f5': img_f5
-        }, verbose=0)
-        
-        # Extract predictions for each Φ
-        predictions['phi1'] = int(np.argmax(preds[0], axis=1)[0])
-        predictions['phi2'] = int(np.argmax(preds[1], axis=1)[0])
-        predictions['phi3'] = int(np.argmax(preds[2], axis=1)[0])
-        predictions['phi4'] = int(np.argmax(preds[3], axis=1)[0])
-        predictions['phi5'] = int(np.argmax(preds[4], axis=1)[0])
-        
-        print(f"Φ1 prediction: {predictions['phi1']}")
-        print(f"Φ2 prediction: {predictions['phi2']}")
-        print(f"Φ3 prediction: {predictions['phi3']}")
-        print(f"Φ4 prediction: {predictions['phi4']}")
-        print(f"Φ5 prediction: {predictions['phi5']}")
-        
-    except Exception as e:
-        print(f"Error in prediction: {e}")
-        import traceback
-        traceback.print_exc()
-        # Default to 0 (Circulation) on error
-        for phi_index in range(1, 6):
-            predictions[f'phi{phi_index}'] = 0
+    for phi_index in phi_indices:
+        print(f"Φ{phi_index} prediction: {predictions[f'phi{phi_index}']}")
     
     return predictions
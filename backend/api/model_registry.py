@@ -0,0 +1,331 @@
+"""
+Model Registry
+Versioned Keras models under MODEL_REGISTRY_DIR, with background loading and
+atomic hot swap
+
+Layout:
+    models/
+        registry.json          {"active": "v2"}
+        v1/model.keras
+        v2/model.keras
+        best_model_all.keras   legacy single model, listed as version "best_model_all"
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+from django.conf import settings
+
+MODEL_FILENAME = 'model.keras'
+REGISTRY_FILENAME = 'registry.json'
+VERSION_RE = re.compile(r'^[\w.-]+$')
+# A version that failed to load is not retried from registry.json for this long
+FAILED_VERSION_RETRY_SECONDS = 300
+
+
+def configure_tensorflow_threads(tf):
+    """Size TensorFlow's thread pools from the CPU budget (settings.CPU_THREADS)"""
+    threads = settings.CPU_THREADS
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads['TF_INTRA_OP_THREADS'])
+        tf.config.threading.set_inter_op_parallelism_threads(threads['TF_INTER_OP_THREADS'])
+    except RuntimeError:
+        # Already initialized by an earlier load; the pools keep their size
+        pass
+
+
+def start_background_preload():
+    """
+    Import the ML stack and load the active model in a daemon thread
+
+    Does nothing unless settings.ML_PRELOAD is set. Prediction workers turn
+    it on so their first request does not pay for importing TensorFlow,
+    NumPy, Matplotlib and openpyxl; list/delete-only workers leave it off and
+    stay small.
+    """
+    if not getattr(settings, 'ML_PRELOAD', False):
+        return
+
+    def run():
+        try:
+            import openpyxl  # noqa: F401
+            from . import ml_predictor, rendering  # noqa: F401
+            ml_predictor.get_model()
+        except Exception as e:
+            print(f"ML preload failed: {e}")
+
+    threading.Thread(target=run, name='ml-preload', daemon=True).start()
+
+
+class NormalizingModel:
+    """
+    Fallback for models that cannot be wrapped in the graph: converts uint8
+    batches to float32 in [0, 1] in Python before predicting
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.input_names = getattr(model, 'input_names', None)
+
+    def _normalize(self, inputs):
+        import numpy as np
+        return {name: np.asarray(batch, dtype='float32') / 255.0 for name, batch in inputs.items()}
+
+    def predict_on_batch(self, inputs):
+        return self.model.predict_on_batch(self._normalize(inputs))
+
+    def predict(self, inputs, **kwargs):
+        return self.model.predict(self._normalize(inputs), **kwargs)
+
+
+def uint8_input_model(tf, model):
+    """
+    Make a model trained on [0, 1] float images take uint8 pixels
+
+    The wrapper's inputs are uint8 and a Rescaling layer normalizes them in
+    the graph, so float32 copies of the batches are never made in Python.
+    Models whose inputs are already uint8 are returned unchanged.
+    """
+    try:
+        if all(tensor.dtype == 'uint8' for tensor in model.inputs):
+            return model
+        names = getattr(model, 'input_names', None) or [tensor.name.split(':')[0] for tensor in model.inputs]
+        inputs = {
+            name: tf.keras.Input(shape=tuple(tensor.shape[1:]), dtype='uint8', name=name)
+            for name, tensor in zip(names, model.inputs)
+        }
+        rescale = tf.keras.layers.Rescaling(1 / 255.0)
+        outputs = model({name: rescale(tensor) for name, tensor in inputs.items()})
+        return tf.keras.Model(inputs=inputs, outputs=outputs, name=f'{model.name}_uint8')
+    except Exception as e:
+        print(f"Could not add uint8 inputs to the model ({e}); normalizing in Python")
+        return NormalizingModel(model)
+
+
+def load_keras_model(path):
+    """Load a Keras model file, wrapped to take uint8 pixel batches"""
+    import tensorflow as tf
+    configure_tensorflow_threads(tf)
+    return uint8_input_model(tf, tf.keras.models.load_model(path))
+
+
+class ModelRegistry:
+    """
+    Serves the active model version and swaps in new ones without downtime
+
+    current() returns a (version, model) pair. Callers keep using the pair
+    they got for the whole batch, so a swap never affects in-flight work:
+    the new model is loaded and warmed up in a background thread and only
+    then replaces the active reference.
+
+    The active version is persisted in registry.json. Every process checks
+    that file at most every poll_seconds and hot-swaps when it changes, so
+    `manage.py model_registry activate` reaches all web workers. A version
+    that fails to load is retried from the file only after
+    FAILED_VERSION_RETRY_SECONDS; activate() retries it right away.
+    """
+
+    def __init__(self, root, legacy_path=None, warm_up=None, poll_seconds=5):
+        self.root = str(root)
+        self.legacy_path = str(legacy_path) if legacy_path else None
+        self.warm_up = warm_up
+        self.poll_seconds = poll_seconds
+        self._active = None
+        self._loading = None
+        self._load_lock = threading.Lock()
+        # Guards _loading, _failed and _checked_at, so one swap starts per version
+        self._state_lock = threading.Lock()
+        self._failed = {}
+        self._checked_at = 0.0
+
+    # Versions on disk
+
+    def legacy_version(self):
+        return os.path.splitext(os.path.basename(self.legacy_path))[0] if self.legacy_path else None
+
+    def path_for(self, version):
+        """Model file of a version"""
+        if version == self.legacy_version():
+            return self.legacy_path
+        return os.path.join(self.root, version, MODEL_FILENAME)
+
+    def versions(self):
+        """Available versions, sorted by name"""
+        found = []
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if os.path.isfile(os.path.join(self.root, name, MODEL_FILENAME)):
+                    found.append(name)
+        if self.legacy_path and os.path.isfile(self.legacy_path):
+            found.append(self.legacy_version())
+        return sorted(found)
+
+    def configured_version(self):
+        """The version registry.json selects, else the newest versioned directory, else the legacy model"""
+        try:
+            with open(os.path.join(self.root, REGISTRY_FILENAME)) as f:
+                version = json.load(f).get('active')
+            if version:
+                return version
+        except (FileNotFoundError, ValueError):
+            pass
+
+        versioned = [version for version in self.versions() if version != self.legacy_version()]
+        if versioned:
+            return versioned[-1]
+        return self.legacy_version()
+
+    def set_configured_version(self, version):
+        """Persist the active version (atomically, so readers never see a partial file)"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f'.{REGISTRY_FILENAME}.{os.getpid()}')
+        with open(tmp_path, 'w') as f:
+            json.dump({'active': version}, f)
+        os.replace(tmp_path, os.path.join(self.root, REGISTRY_FILENAME))
+
+    def register(self, source_path, version):
+        """Copy a model file into the registry as a new version"""
+        if not VERSION_RE.match(version):
+            raise ValueError(f"Invalid version name: {version!r}")
+        if version in self.versions():
+            raise ValueError(f"Version already exists: {version}")
+        if not os.path.isfile(source_path):
+            raise FileNotFoundError(f"Model file not found at: {source_path}")
+
+        os.makedirs(os.path.join(self.root, version))
+        shutil.copy2(source_path, self.path_for(version))
+        return self.path_for(version)
+
+    # Loaded model
+
+    def status(self):
+        return {
+            'active': self._active[0] if self._active else None,
+            'configured': self.configured_version(),
+            'loading': self._loading,
+            'failed': sorted(self._failed),
+            'versions': self.versions(),
+        }
+
+    def current(self):
+        """
+        The active (version, model) pair, loading it on first use
+
+        Raises:
+            FileNotFoundError: If the configured version has no model file
+        """
+        active = self._active
+        if active is None:
+            with self._load_lock:
+                if self._active is None:
+                    version = self.configured_version()
+                    self._active = (version, self._load(version))
+                    self._checked_at = time.monotonic()
+            return self._active
+
+        self._follow_registry_file()
+        return active
+
+    def activate(self, version, persist=True, background=True):
+        """
+        Make a version active
+
+        Args:
+            version: Version to switch to
+            persist: Write it to registry.json so other processes follow
+            background: Load and swap in a daemon thread; the current
+                version keeps serving until the new one is warmed up
+
+        Raises:
+            ValueError: If the version does not exist
+        """
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        if persist:
+            self.set_configured_version(version)
+
+        with self._state_lock:
+            # An explicit activation retries a version that failed to load
+            self._failed.pop(version, None)
+            if background and self._loading == version:
+                return
+            self._loading = version
+        if background:
+            self._start_swap(version)
+        else:
+            self._swap(version)
+
+    def reload(self):
+        """Reload the configured version in the background, serving the old model meanwhile"""
+        if self._active is None:
+            return
+        version = self.configured_version()
+        with self._state_lock:
+            self._failed.pop(version, None)
+            self._loading = version
+        self._start_swap(version, name='model-reload')
+
+    def _follow_registry_file(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.poll_seconds:
+            return
+
+        # Checked and claimed under the lock: concurrent requests start one swap between them
+        with self._state_lock:
+            if now - self._checked_at < self.poll_seconds:
+                return
+            self._checked_at = now
+
+            version = self.configured_version()
+            if version in (self._active[0], self._loading):
+                return
+            failed_at = self._failed.get(version)
+            if failed_at is not None and now - failed_at < FAILED_VERSION_RETRY_SECONDS:
+                return
+            if version not in self.versions():
+                # registry.json names a version that is not on disk; keep serving
+                print(f"Model registry: unknown model version {version}")
+                return
+            self._loading = version
+
+        print(f"Model registry: switching to version {version}")
+        self._start_swap(version)
+
+    def _start_swap(self, version, name=None):
+        threading.Thread(
+            target=self._swap, args=(version,), name=name or f'model-load-{version}', daemon=True
+        ).start()
+
+    def _swap(self, version):
+        with self._load_lock:
+            try:
+                model = self._load(version)
+                # Single reference assignment: requests see either the old pair or the new one
+                self._active = (version, model)
+                with self._state_lock:
+                    self._failed.pop(version, None)
+                print(f"Model version {version} is now active")
+            except Exception as e:
+                with self._state_lock:
+                    self._failed[version] = time.monotonic()
+                print(f"Error activating model version {version}: {e}")
+            finally:
+                with self._state_lock:
+                    if self._loading == version:
+                        self._loading = None
+
+    def _load(self, version):
+        path = self.path_for(version) if version else None
+        print(f"Loading model version {version} from: {path}")
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Model file not found at: {path}")
+
+        model = load_keras_model(path)
+        if self.warm_up:
+            self.warm_up(model)
+        print("Model loaded successfully!")
+        print(f"Model inputs: {model.input_names if hasattr(model, 'input_names') else 'N/A'}")
+        return model
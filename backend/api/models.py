@@ -5,7 +5,7 @@ from django.utils import timezone
 class TextFile(models.Model):
     """Model to store uploaded text files"""
     file = models.FileField(upload_to='uploads/')
-    filename = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255, db_index=True)
     uploaded_at = models.DateTimeField(default=timezone.now)
     
     def __str__(self):
@@ -15,6 +15,8 @@ class TextFile(models.Model):
 class GeneratedImage(models.Model):
     """Model to store generated images"""
     image = models.ImageField(upload_to='generated_images/')
+    thumbnail = models.ImageField(upload_to='thumbnails/', blank=True)
+    phi_index = models.PositiveSmallIntegerField(null=True, blank=True)
     text_files = models.ManyToManyField(TextFile, related_name='generated_images')
     created_at = models.DateTimeField(default=timezone.now)
     
@@ -27,7 +29,51 @@ class Prediction(models.Model):
     image = models.ForeignKey(GeneratedImage, on_delete=models.CASCADE, related_name='predictions')
     prediction_result = models.JSONField()
     confidence = models.FloatField(null=True, blank=True)
+    model_version = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     
     def __str__(self):
         return f"Prediction {self.id} for Image {self.image.id}"
+
+
+class FilePrediction(models.Model):
+    """Model to store the per-Φ classes predicted for an uploaded text file"""
+    text_file = models.OneToOneField(TextFile, on_delete=models.CASCADE, related_name='file_prediction')
+    file_hash = models.CharField(max_length=64, blank=True, db_index=True)  # SHA-256 of the file contents
+    phi1 = models.PositiveSmallIntegerField(null=True, blank=True)
+    phi2 = models.PositiveSmallIntegerField(null=True, blank=True)
+    phi3 = models.PositiveSmallIntegerField(null=True, blank=True)
+    phi4 = models.PositiveSmallIntegerField(null=True, blank=True)
+    phi5 = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Probability of the predicted class, per Φ head
+    conf1 = models.FloatField(null=True, blank=True)
+    conf2 = models.FloatField(null=True, blank=True)
+    conf3 = models.FloatField(null=True, blank=True)
+    conf4 = models.FloatField(null=True, blank=True)
+    conf5 = models.FloatField(null=True, blank=True)
+    model_version = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=[f'phi{phi_index}'], name=f'api_filepred_phi{phi_index}_idx')
+            for phi_index in range(1, 6)
+        ]
+    
+    def as_dict(self):
+        """Predicted classes in the upload_and_predict format, skipping Φ columns not predicted"""
+        values = {f'phi{phi_index}': getattr(self, f'phi{phi_index}') for phi_index in range(1, 6)}
+        return {key: value for key, value in values.items() if value is not None}
+    
+    def __str__(self):
+        return f"Prediction for {self.text_file.filename}"
+
+
+class TableVersion(models.Model):
+    """Model to store a version stamp per table, bumped after every write (used for HTTP caching)"""
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
@@ -0,0 +1,40 @@
+"""
+Φ columns
+The Φ column indices of the orbit files and parsing of requested subsets.
+Free of heavy imports, so views and exports can use them without loading
+the ML stack.
+"""
+
+# Φ columns in the orbit files, one model input/output head per column
+PHI_INDICES = (1, 2, 3, 4, 5)
+
+
+def parse_phi_indices(value):
+    """
+    Parse a requested subset of Φ columns
+    
+    Args:
+        value: None, "1,3", [1, 3] or ["1", "3"]; empty means all columns
+        
+    Returns:
+        tuple: Sorted, de-duplicated Φ indices, e.g. (1, 3)
+        
+    Raises:
+        ValueError: If an index is not one of PHI_INDICES
+    """
+    if value is None:
+        return PHI_INDICES
+    if isinstance(value, str):
+        value = [value]
+    
+    indices = set()
+    for item in value:
+        for part in str(item).split(','):
+            part = part.strip().lower().removeprefix('phi')
+            if not part:
+                continue
+            if not part.isdigit() or int(part) not in PHI_INDICES:
+                raise ValueError(f"Invalid Φ index: {part!r} (expected one of {list(PHI_INDICES)})")
+            indices.add(int(part))
+    
+    return tuple(sorted(indices)) or PHI_INDICES
@@ -0,0 +1,155 @@
+"""
+Request profiling
+Captures cProfile profiles of selected API views on demand (staff users) or
+for a sample of all requests, and stores them outside MEDIA_ROOT so only
+the staff-only /api/profiles/ endpoints expose them
+"""
+import cProfile
+import datetime
+import functools
+import os
+import pstats
+import random
+import re
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_PROFILING = {
+    'SAMPLE_RATE': 0,
+    'DIR': 'profiles',  # Relative to BASE_DIR
+    'KEEP': 200,
+}
+
+PROFILE_NAME_RE = re.compile(r'^[\w.-]+\.prof$')
+
+
+def get_profiling():
+    """REQUEST_PROFILING from settings, with defaults filled in"""
+    return {**DEFAULT_PROFILING, **getattr(settings, 'REQUEST_PROFILING', {})}
+
+
+def profile_dir():
+    return os.path.join(settings.BASE_DIR, get_profiling()['DIR'])
+
+
+def profile_requested(request):
+    """Whether a request should be profiled: asked for by a staff user, or sampled"""
+    asked = (
+        request.query_params.get('profile') in ('1', 'true')
+        or request.headers.get('X-Profile') in ('1', 'true')
+    )
+    if asked and request.user.is_staff:
+        return True
+
+    rate = get_profiling()['SAMPLE_RATE']
+    return bool(rate) and random.random() < rate
+
+
+def save_profile(profiler, view_name, seconds):
+    """
+    Write a profile to the profiles directory and prune the oldest ones
+
+    Returns:
+        str: File name of the profile, e.g. 20240501-101500-123456-upload_and_predict-2350ms.prof
+    """
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    name = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{view_name}-{seconds * 1000:.0f}ms.prof"
+    profiler.dump_stats(os.path.join(directory, name))
+
+    names = sorted(profile_names(), reverse=True)
+    for old in names[get_profiling()['KEEP']:]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except OSError:
+            pass
+    return name
+
+
+def profiled(view_name):
+    """
+    Profile a view when profile_requested() says so
+
+    Apply below @api_view. Profiled responses carry an X-Profile-Id header
+    naming the stored profile.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not profile_requested(request):
+                return view(request, *args, **kwargs)
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profile is running (one at a time from Python 3.12)
+                return view(request, *args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                profiler.disable()
+                seconds = time.perf_counter() - start
+
+            try:
+                response['X-Profile-Id'] = save_profile(profiler, view_name, seconds)
+            except OSError as e:
+                print(f"Error saving profile of {view_name}: {e}")
+            return response
+        return wrapper
+    return decorator
+
+
+def profile_names():
+    """File names of the stored profiles"""
+    try:
+        return [name for name in os.listdir(profile_dir()) if PROFILE_NAME_RE.match(name)]
+    except FileNotFoundError:
+        return []
+
+
+def profile_summary(name, top=15):
+    """
+    Summarize a stored profile
+
+    Args:
+        name: Profile file name
+        top: How many functions to list
+
+    Returns:
+        dict: {'id', 'view', 'duration_ms', 'created_at', 'total_calls',
+        'functions': [{'function', 'calls', 'own_seconds', 'cumulative_seconds'}]}
+        with functions sorted by cumulative time
+
+    Raises:
+        FileNotFoundError: If there is no such profile
+        ValueError, EOFError: If the profile file is corrupt or truncated
+    """
+    if not PROFILE_NAME_RE.match(name):
+        raise FileNotFoundError(name)
+    path = os.path.join(profile_dir(), name)
+    stats = pstats.Stats(path)
+
+    functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    parts = name[:-len('.prof')].split('-')
+    return {
+        'id': name,
+        'view': '-'.join(parts[3:-1]),
+        'duration_ms': int(parts[-1].removesuffix('ms')) if parts[-1].endswith('ms') else None,
+        'created_at': datetime.datetime.fromtimestamp(os.path.getmtime(path), tz=datetime.timezone.utc).isoformat(),
+        'total_calls': stats.total_calls,
+        'functions': [
+            {
+                'function': f'{function} ({os.path.basename(filename)}:{line})',
+                'calls': calls,
+                'own_seconds': round(own, 4),
+                'cumulative_seconds': round(cumulative, 4),
+            }
+            for (filename, line, function), (_, calls, own, cumulative, _) in functions
+        ],
+    }
@@ -0,0 +1,144 @@
+"""
+Φ scatter plot rendering
+Turns the columns of an orbit text file into the 224x224 images the model
+classifies. Imports NumPy, Matplotlib and Pillow, so only the prediction and
+download paths load this module.
+"""
+import io
+import os
+
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+
+def generate_scatter_plot_image(text_file_path, phi_index):
+    """
+    Generate scatter plot image from text file data
+    
+    Args:
+        text_file_path: Path to the text file with data
+        phi_index: Which Phi column to plot (1-5)
+    
+    Returns:
+        PIL Image object (224x224 pixels, white background)
+    """
+    return generate_scatter_plot_images(text_file_path, [phi_index])[phi_index]
+
+
+def generate_scatter_plot_images(text_file_path, phi_indices):
+    """
+    Generate scatter plot images for several Phi columns of one text file
+    
+    The file is read once, and only column 0 and the requested Phi columns
+    are parsed.
+    
+    Args:
+        text_file_path: Path to the text file with data
+        phi_indices: Which Phi columns to plot (subset of 1-5)
+    
+    Returns:
+        dict: {phi_index: PIL Image (224x224 pixels, white background)}
+    
+    Raises:
+        ValueError: If the file cannot be read or has no data rows
+    """
+    # Configuration
+    DELIMITER = '\t'
+    phi_indices = list(phi_indices)
+    
+    try:
+        # Load the data (Column 0 for X, the requested Phi columns for Y)
+        data = np.loadtxt(text_file_path, delimiter=DELIMITER, usecols=[0, *phi_indices], ndmin=2)
+    except Exception as e:
+        # No blank images: the model would still classify them
+        raise ValueError(f"Could not read data from {os.path.basename(text_file_path)}: {e}") from e
+    
+    if not len(data):
+        raise ValueError(f"No data rows in {os.path.basename(text_file_path)}")
+    
+    return {
+        phi_index: render_scatter_plot(data[:, 0], data[:, position], phi_index)
+        for position, phi_index in enumerate(phi_indices, 1)
+    }
+
+
+def render_scatter_plot(x_data, y_data, phi_index):
+    """
+    Render one Phi column as a scatter plot image
+    
+    Args:
+        x_data: Values from column 0
+        y_data: Values from the Phi column
+        phi_index: Which Phi column is plotted (used for error messages)
+    
+    Returns:
+        PIL Image object (224x224 pixels, white background)
+    
+    Raises:
+        ValueError: If the data cannot be plotted
+    """
+    # Configuration
+    DPI = 100
+    FIGURE_SIZE_INCHES = 2.24
+    fig = None
+    
+    try:
+        # 1. Create the Figure with a white background
+        fig = plt.figure(
+            figsize=(FIGURE_SIZE_INCHES, FIGURE_SIZE_INCHES),
+            frameon=False
+        )
+        fig.set_facecolor('white')
+        
+        # 2. Create the Axes object to cover the entire figure area
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        ax.set_facecolor('white')
+        
+        # 3. Plot the data as a SCATTER of black points
+        ax.scatter(x_data, y_data, color='black', marker='o', s=1)
+        
+        # 4. Set limits to exact data range (no buffer/padding)
+        x_min, x_max = x_data.min(), x_data.max()
+        y_min, y_max = y_data.min(), y_data.max()
+        ax.set_xlim(x_min, x_max)
+        ax.set_ylim(y_min, y_max)
+        
+        # 5. Save to BytesIO buffer
+        buf = io.BytesIO()
+        plt.savefig(
+            buf,
+            format='png',
+            dpi=DPI,
+            bbox_inches='tight',
+            pad_inches=0,
+            facecolor='white',
+            edgecolor='white',
+            transparent=False
+        )
+        plt.close(fig)
+        buf.seek(0)
+        
+        # 6. Convert to RGB and ensure white background
+        img = Image.open(buf)
+        
+        # Create a white background image
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img = img.convert('RGBA')
+            white_bg = Image.new('RGB', img.size, (255, 255, 255))
+            white_bg.paste(img, mask=img.split()[3])
+        else:
+            white_bg = img.convert('RGB')
+        
+        # Resize to 224x224 without adding white edges
+        resized_img = white_bg.resize((224, 224), Image.Resampling.LANCZOS)
+        
+        return resized_img
+        
+    except Exception as e:
+        if fig is not None:
+            plt.close(fig)
+        raise ValueError(f"Could not plot Phi {phi_index}: {e}") from e
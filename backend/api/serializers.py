@@ -14,7 +14,7 @@ class GeneratedImageSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = GeneratedImage
-        fields = ['id', 'image', 'text_files', 'created_at']
+        fields = ['id', 'image', 'thumbnail', 'phi_index', 'text_files', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
@@ -23,5 +23,5 @@ class PredictionSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Prediction
-        fields = ['id', 'image', 'prediction_result', 'confidence', 'created_at']
+        fields = ['id', 'image', 'prediction_result', 'confidence', 'model_version', 'created_at']
         read_only_fields = ['id', 'created_at']
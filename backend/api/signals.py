@@ -0,0 +1,28 @@
+"""
+Signal handlers
+Keep the table version stamps used by the list caches current
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import table_changed
+from .models import TextFile, GeneratedImage, Prediction, FilePrediction
+
+VERSIONED_MODELS = (TextFile, GeneratedImage, Prediction, FilePrediction)
+
+
+def bump_on_write(sender, **kwargs):
+    table_changed(sender)
+
+
+# Connected per model: a catch-all receiver would make Django load every row
+# of other tables (e.g. M2M links) before deleting them, just to send signals
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_on_write, sender=model, dispatch_uid=f'bump_on_save_{model._meta.label}')
+    post_delete.connect(bump_on_write, sender=model, dispatch_uid=f'bump_on_delete_{model._meta.label}')
+
+
+@receiver(m2m_changed, sender=GeneratedImage.text_files.through)
+def bump_on_image_sources_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        table_changed(GeneratedImage)
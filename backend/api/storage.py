@@ -0,0 +1,282 @@
+"""
+Storage lifecycle
+Deletes uploaded files together with their generated artifacts, and enforces
+the STORAGE_RETENTION policy from settings
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import TextFile, GeneratedImage
+
+DEFAULT_RETENTION = {
+    'MAX_AGE_DAYS': None,
+    'MAX_BYTES': None,
+    'BATCH_SIZE': 500,
+    'SWEEP_INTERVAL_SECONDS': None,
+}
+
+_sweeper_thread = None
+
+# Stored file names waiting for the background unlinker
+_unlink_queue = queue.Queue()
+_unlinker_thread = None
+
+
+def get_retention():
+    """STORAGE_RETENTION from settings, with defaults filled in"""
+    return {**DEFAULT_RETENTION, **getattr(settings, 'STORAGE_RETENTION', {})}
+
+
+def stored_size(name):
+    """Size in bytes of a stored file, 0 if it is missing"""
+    if not name:
+        return 0
+    try:
+        return os.path.getsize(default_storage.path(name))
+    except OSError:
+        return 0
+
+
+def remove_files(names):
+    """
+    Remove stored files from disk
+
+    Args:
+        names: Storage names as kept in FileField/ImageField columns
+
+    Returns:
+        int: Bytes reclaimed
+    """
+    reclaimed = 0
+    for name in names:
+        if not name:
+            continue
+        try:
+            path = default_storage.path(name)
+            size = os.path.getsize(path)
+            os.remove(path)
+            reclaimed += size
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing {name}: {e}")
+    return reclaimed
+
+
+def content_hash(file):
+    """SHA-256 hex digest of an uploaded or stored file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_file_names(images):
+    """Storage names of the image and thumbnail files of GeneratedImage rows"""
+    return [name for pair in images.values_list('image', 'thumbnail') for name in pair]
+
+
+def remove_files_in_background(names):
+    """
+    Queue stored files for removal by a daemon thread
+
+    Files still queued when the process exits stay on disk.
+    """
+    global _unlinker_thread
+
+    _unlink_queue.put(list(names))
+    if _unlinker_thread is not None:
+        return
+
+    def run():
+        while True:
+            batch = _unlink_queue.get()
+            reclaimed = remove_files(batch)
+            print(f"Removed {len(batch)} stored files in the background ({reclaimed} bytes)")
+
+    _unlinker_thread = threading.Thread(target=run, name='storage-unlinker', daemon=True)
+    _unlinker_thread.start()
+
+
+def delete_text_files(text_files, background=False):
+    """
+    Delete text files and everything generated from them
+
+    Generated images left without any source file are deleted as well,
+    which cascades to their predictions. Rows go in one transaction; files
+    are removed from disk once it has committed.
+
+    Args:
+        text_files: IDs of the TextFile rows to delete, or a TextFile queryset
+        background: Remove the files from disk in a background thread
+            instead of before returning
+
+    Returns:
+        dict: {'files': rows deleted, 'images': rows deleted, 'bytes': bytes
+        reclaimed, or None when the files are removed in the background}
+    """
+    if not isinstance(text_files, QuerySet):
+        text_files = TextFile.objects.filter(id__in=list(text_files))
+
+    with transaction.atomic():
+        file_names = list(text_files.values_list('file', flat=True))
+        image_ids = list(
+            GeneratedImage.objects.filter(text_files__in=text_files)
+            .values_list('id', flat=True).distinct()
+        )
+        files_deleted = text_files.delete()[1].get(TextFile._meta.label, 0)
+
+        # Images whose every source file is now gone
+        orphans = GeneratedImage.objects.filter(id__in=image_ids, text_files=None)
+        image_names = image_file_names(orphans)
+        images_deleted = orphans.delete()[1].get(GeneratedImage._meta.label, 0)
+
+        names = file_names + image_names
+        if background and names:
+            transaction.on_commit(lambda: remove_files_in_background(names))
+
+    reclaimed = None if background else remove_files(names)
+    return {'files': files_deleted, 'images': images_deleted, 'bytes': reclaimed}
+
+
+def upload_sizes(text_file_ids_and_names):
+    """
+    Bytes each upload occupies on disk: the text file plus its generated images and thumbnails
+
+    Args:
+        text_file_ids_and_names: (TextFile id, stored file name) pairs
+
+    Returns:
+        dict: {text_file_id: bytes}
+    """
+    sizes = {text_file_id: stored_size(name) for text_file_id, name in text_file_ids_and_names}
+    images = GeneratedImage.objects.filter(text_files__in=list(sizes)).values_list('text_files', 'image', 'thumbnail')
+    image_bytes = defaultdict(int)
+    for text_file_id, image, thumbnail in images:
+        image_bytes[text_file_id] += stored_size(image) + stored_size(thumbnail)
+    return {text_file_id: size + image_bytes[text_file_id] for text_file_id, size in sizes.items()}
+
+
+def media_usage():
+    """Bytes used on disk by all uploaded files and generated images"""
+    total = sum(stored_size(name) for name in TextFile.objects.values_list('file', flat=True).iterator())
+    total += sum(
+        stored_size(image) + stored_size(thumbnail)
+        for image, thumbnail in GeneratedImage.objects.values_list('image', 'thumbnail').iterator()
+    )
+    return total
+
+
+def sweep(max_age_days=None, max_bytes=None, batch_size=500):
+    """
+    Enforce the retention policy, deleting the oldest uploads first
+
+    Args:
+        max_age_days: Delete files uploaded more than this many days ago
+        max_bytes: Then delete the oldest files until media usage is at most this
+        batch_size: Text files deleted per transaction
+
+    Returns:
+        dict: {'files': ..., 'images': ..., 'bytes': ...} totals over all batches
+    """
+    totals = {'files': 0, 'images': 0, 'bytes': 0}
+
+    def delete_batch(ids):
+        result = delete_text_files(ids)
+        for key in totals:
+            totals[key] += result[key]
+        return result
+
+    # Generated images left behind without any source file
+    while True:
+        orphan_ids = list(GeneratedImage.objects.filter(text_files=None).values_list('id', flat=True)[:batch_size])
+        if not orphan_ids:
+            break
+        with transaction.atomic():
+            orphans = GeneratedImage.objects.filter(id__in=orphan_ids)
+            image_names = image_file_names(orphans)
+            totals['images'] += orphans.delete()[1].get(GeneratedImage._meta.label, 0)
+        totals['bytes'] += remove_files(image_names)
+
+    oldest_first = TextFile.objects.order_by('uploaded_at', 'id').values_list('id', flat=True)
+
+    if max_age_days is not None:
+        cutoff = timezone.now() - timedelta(days=max_age_days)
+        while True:
+            ids = list(oldest_first.filter(uploaded_at__lt=cutoff)[:batch_size])
+            if not ids:
+                break
+            delete_batch(ids)
+
+    if max_bytes is not None:
+        usage = media_usage()
+        while usage > max_bytes:
+            # Only take as many files as needed to get under the limit, counting
+            # the images stored with each upload as well as the text file
+            ids = []
+            excess = usage - max_bytes
+            candidates = TextFile.objects.order_by('uploaded_at', 'id').values_list('id', 'file')[:batch_size]
+            for text_file_id, size in upload_sizes(candidates).items():
+                ids.append(text_file_id)
+                excess -= size
+                if excess <= 0:
+                    break
+            if not ids:
+                break
+            usage -= delete_batch(ids)['bytes']
+
+    return totals
+
+
+def sweep_with_settings():
+    """Run sweep() with the configured STORAGE_RETENTION policy"""
+    retention = get_retention()
+    return sweep(
+        max_age_days=retention['MAX_AGE_DAYS'],
+        max_bytes=retention['MAX_BYTES'],
+        batch_size=retention['BATCH_SIZE'],
+    )
+
+
+def start_background_sweeper():
+    """
+    Run the sweep periodically in a daemon thread
+
+    Does nothing unless STORAGE_RETENTION['SWEEP_INTERVAL_SECONDS'] is set.
+    Each server process starts its own sweeper; sweeps are idempotent, so
+    overlapping ones only repeat work.
+    """
+    global _sweeper_thread
+
+    interval = get_retention()['SWEEP_INTERVAL_SECONDS']
+    if not interval or _sweeper_thread is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                totals = sweep_with_settings()
+                if totals['files'] or totals['images']:
+                    print(
+                        f"Storage sweep: deleted {totals['files']} files, {totals['images']} images, "
+                        f"reclaimed {totals['bytes']} bytes"
+                    )
+            except Exception as e:
+                print(f"Storage sweep failed: {e}")
+            finally:
+                close_old_connections()
+
+    _sweeper_thread = threading.Thread(target=run, name='storage-sweeper', daemon=True)
+    _sweeper_thread.start()
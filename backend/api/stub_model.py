@@ -0,0 +1,76 @@
+"""
+Stub model
+Stands in for the Keras model in load tests: same five inputs and five
+three-class output heads, no TensorFlow
+"""
+import time
+
+import numpy as np
+
+from .model_registry import ModelRegistry
+
+STUB_VERSION = 'stub'
+
+
+class StubModel:
+    """
+    Classifies each Φ image by how much of it is covered by points
+
+    Cheap and deterministic, so the same file always gets the same classes.
+    Accepts float inputs in [0, 1] as well as uint8 pixels.
+
+    Args:
+        delay_ms: Simulated inference time per file
+    """
+
+    input_names = [f'input_f{phi_index}' for phi_index in range(1, 6)]
+
+    def __init__(self, delay_ms=0):
+        self.delay_ms = delay_ms
+
+    def predict(self, inputs, batch_size=None, verbose=0):
+        return self.predict_on_batch(inputs)
+
+    def predict_on_batch(self, inputs):
+        batch_size = len(inputs[self.input_names[0]])
+        if self.delay_ms:
+            time.sleep(self.delay_ms * batch_size / 1000.0)
+
+        outputs = []
+        for name in self.input_names:
+            pixels = np.asarray(inputs[name])
+            white = 255 if pixels.dtype == np.uint8 else 1.0
+            # Fraction of dark pixels per image, bucketed into the three classes
+            coverage = (pixels[:, ::8, ::8, 0] < white / 2).mean(axis=(1, 2))
+            classes = np.minimum((coverage * 30).astype(int), 2)
+            probabilities = np.full((batch_size, 3), 0.1, dtype='float32')
+            probabilities[np.arange(batch_size), classes] = 0.8
+            outputs.append(probabilities)
+        return outputs
+
+
+class StubRegistry(ModelRegistry):
+    """A registry that always serves one StubModel, listed as version "stub" """
+
+    def __init__(self, delay_ms=0, warm_up=None):
+        super().__init__(root='', warm_up=warm_up)
+        self.delay_ms = delay_ms
+
+    def versions(self):
+        return [STUB_VERSION]
+
+    def configured_version(self):
+        return STUB_VERSION
+
+    def set_configured_version(self, version):
+        pass
+
+    def register(self, source_path, version):
+        raise ValueError('The stub model registry does not accept new versions')
+
+    def _load(self, version):
+        model = StubModel(self.delay_ms)
+        if self.warm_up:
+            self.warm_up(model)
+        print(f"Stub model loaded (delay {self.delay_ms} ms per file)")
+        return model
@@ -0,0 +1,43 @@
+"""
+Synthetic orbit files
+Generates data in the layout of uploaded files (column 0 = time, columns 1-5 = Φ1..Φ5
+in degrees) for benchmarks and load tests
+"""
+import io
+
+import numpy as np
+
+
+def synthetic_orbit_text(rows=2000, seed=0):
+    """
+    Generate one tab-delimited orbit file
+
+    Each Φ column is randomly a circulating angle, a librating one, or a
+    mix of both, so the rendered plots look like real inputs.
+
+    Args:
+        rows: Number of time steps
+        seed: Random seed; the same seed gives the same file
+
+    Returns:
+        str: File contents
+    """
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0.0, 1000.0, rows)
+    columns = [t]
+
+    for _ in range(5):
+        frequency = rng.uniform(0.01, 0.1)
+        circulating = (frequency * 360.0 * t / 10.0 + rng.uniform(0, 360)) % 360
+        librating = 180.0 + rng.uniform(10, 90) * np.sin(frequency * t + rng.uniform(0, 2 * np.pi))
+        kind = rng.integers(0, 3)
+        if kind == 0:
+            columns.append(circulating)
+        elif kind == 1:
+            columns.append(np.where(t < t[-1] / 2, librating, circulating))
+        else:
+            columns.append(librating)
+
+    buf = io.StringIO()
+    np.savetxt(buf, np.column_stack(columns), delimiter='\t', fmt='%.6f')
+    return buf.getvalue()
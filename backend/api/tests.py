@@ -0,0 +1,414 @@
+import csv
+import datetime
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import zipfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .caching import table_stamp
+from .management.commands.check_import_budget import forbidden_imports, import_time_ms, measure_startup
+from .media import parse_range
+from .model_registry import MODEL_FILENAME, ModelRegistry
+from .models import FilePrediction, GeneratedImage, TextFile
+from .profiling import profile_dir
+from .storage import media_usage, sweep
+from .stub_model import StubModel, StubRegistry
+from .synthetic import synthetic_orbit_text
+
+
+class UploadAndPredictTests(TestCase):
+    """POST /api/upload-and-predict/ with the stub model standing in for Keras"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root, STORE_PHI_IMAGES=False)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        registry = mock.patch('api.ml_predictor.REGISTRY', StubRegistry())
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def upload(self, name, content):
+        file = SimpleUploadedFile(name, content.encode(), content_type='text/plain')
+        return self.client.post('/api/upload-and-predict/', {'files': [file], 'phis': '1,2'})
+
+    def test_stores_prediction(self):
+        response = self.upload('orbit.txt', synthetic_orbit_text(rows=200))
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()['predictions'][0]
+        self.assertNotIn('error', result)
+        self.assertEqual(result['model_version'], 'stub')
+        self.assertEqual(FilePrediction.objects.count(), 1)
+
+    def test_unreadable_file_is_not_classified(self):
+        response = self.upload('broken.txt', 'not\tan\torbit\n')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('error', response.json()['details'][0])
+        self.assertFalse(FilePrediction.objects.exists())
+
+    def test_download_reuses_stored_images(self):
+        with override_settings(STORE_PHI_IMAGES=True):
+            file_id = self.upload('orbit.txt', synthetic_orbit_text(rows=200)).json()['predictions'][0]['id']
+
+        with mock.patch('api.rendering.generate_scatter_plot_images') as render:
+            response = self.client.post('/api/download-results/', {'file_ids': [file_id]}, content_type='application/json')
+
+        render.assert_not_called()
+        names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+        self.assertEqual(sorted(names), ['images/orbit_Ф1.jpg', 'images/orbit_Ф2.jpg', 'results.xlsx'])
+
+    def test_stored_images_are_named_by_id(self):
+        with override_settings(STORE_PHI_IMAGES=True):
+            file_id = self.upload('орбита.txt', synthetic_orbit_text(rows=200)).json()['predictions'][0]['id']
+
+        names = GeneratedImage.objects.filter(text_files=file_id).values_list('image', 'thumbnail')
+        for image, thumbnail in names:
+            self.assertRegex(image, rf'^generated_images/{file_id}_phi\d\.png$')
+            self.assertRegex(thumbnail, rf'^thumbnails/{file_id}_phi\d\.png$')
+
+    def test_offload_headers_are_ascii(self):
+        image = GeneratedImage.objects.create(phi_index=1, image=ContentFile(b'png', name='орбита_phi1.png'))
+
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = self.client.get(f'/api/images/{image.id}/content/')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/generated_images/%D0%BE%D1%80%D0%B1%D0%B8%D1%82%D0%B0_phi1.png',
+        )
+
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.client.get(f'/api/images/{image.id}/content/')
+        self.assertTrue(response['X-Sendfile'].isascii())
+        self.assertTrue(response['X-Sendfile'].endswith('%D0%BE%D1%80%D0%B1%D0%B8%D1%82%D0%B0_phi1.png'))
+
+    def test_image_content_answers_head(self):
+        image = GeneratedImage.objects.create(phi_index=1, image=ContentFile(b'0123456789', name='orbit_phi1.png'))
+
+        response = self.client.head(f'/api/images/{image.id}/content/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_download_rejects_file_ids_that_are_not_a_list(self):
+        file_id = self.upload('orbit.txt', synthetic_orbit_text(rows=200)).json()['predictions'][0]['id']
+
+        for file_ids in (str(file_id), file_id, [True], ['x']):
+            response = self.client.post('/api/download-results/', {'file_ids': file_ids}, content_type='application/json')
+            self.assertEqual(response.status_code, 400, file_ids)
+
+    def test_failures_do_not_count_in_stats(self):
+        self.upload('orbit.txt', synthetic_orbit_text(rows=200))
+        self.upload('broken.txt', 'not\tan\torbit\n')
+        with mock.patch.object(StubModel, 'predict_on_batch', side_effect=RuntimeError('inference failed')):
+            self.upload('orbit2.txt', synthetic_orbit_text(rows=200, seed=1))
+
+        stats = self.client.get('/api/predictions/stats/').json()
+
+        self.assertEqual(stats['total'], 1)
+        self.assertEqual(sum(stats['phis']['phi1']['classes'].values()), 1)
+
+    def test_model_failure_is_not_stored(self):
+        with mock.patch.object(StubModel, 'predict_on_batch', side_effect=RuntimeError('inference failed')):
+            response = self.upload('orbit.txt', synthetic_orbit_text(rows=200))
+
+        self.assertEqual(response.status_code, 500)
+        result = response.json()['details'][0]
+        self.assertEqual(result['error'], 'inference failed')
+        self.assertNotIn('phi1', result)
+        self.assertFalse(FilePrediction.objects.exists())
+
+
+class BulkDeleteFilesTests(TestCase):
+    def setUp(self):
+        self.files = [TextFile.objects.create(filename=f'orbit{index}.txt') for index in range(3)]
+
+    def bulk_delete(self, body):
+        return self.client.post('/api/files/bulk-delete/', body, content_type='application/json')
+
+    def test_deletes_listed_files(self):
+        response = self.bulk_delete({'ids': [self.files[0].id, str(self.files[1].id)]})
+
+        self.assertEqual(response.json()['deleted'], 2)
+        self.assertEqual(list(TextFile.objects.all()), [self.files[2]])
+
+    def test_rejects_ids_that_are_not_a_list(self):
+        for ids in ('123', self.files[0].id, {'id': 1}, [True]):
+            response = self.bulk_delete({'ids': ids})
+            self.assertEqual(response.status_code, 400, ids)
+        self.assertEqual(TextFile.objects.count(), 3)
+
+    def test_rejects_empty_ids_without_other_filter(self):
+        response = self.bulk_delete({'ids': []})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(TextFile.objects.count(), 3)
+
+
+class SweepTests(TestCase):
+    """Storage retention: uploads are deleted oldest first, with their generated images"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        # Four uploads of 1500 bytes each: the text file, and Φ images about as large
+        self.files = []
+        for index in range(4):
+            text_file = TextFile.objects.create(
+                file=ContentFile(b'0' * 1000, name=f'orbit{index}.txt'), filename=f'orbit{index}.txt'
+            )
+            image = GeneratedImage.objects.create(
+                phi_index=1,
+                image=ContentFile(b'0' * 400, name=f'orbit{index}_phi1.png'),
+                thumbnail=ContentFile(b'0' * 100, name=f'orbit{index}_phi1_thumb.png'),
+            )
+            image.text_files.add(text_file)
+            self.files.append(text_file)
+
+    def test_max_bytes_counts_stored_images(self):
+        self.assertEqual(media_usage(), 6000)
+
+        totals = sweep(max_bytes=3000)
+
+        self.assertEqual(totals, {'files': 2, 'images': 2, 'bytes': 3000})
+        self.assertEqual(list(TextFile.objects.order_by('id')), self.files[2:])
+        self.assertEqual(media_usage(), 3000)
+
+    def test_max_bytes_deletes_only_what_is_needed(self):
+        totals = sweep(max_bytes=5400)
+
+        self.assertEqual(totals['files'], 1)
+        self.assertEqual(TextFile.objects.count(), 3)
+
+    def test_max_age_days(self):
+        TextFile.objects.filter(id=self.files[0].id).update(uploaded_at=timezone.now() - datetime.timedelta(days=10))
+
+        totals = sweep(max_age_days=7)
+
+        self.assertEqual(totals['files'], 1)
+        self.assertFalse(TextFile.objects.filter(id=self.files[0].id).exists())
+        self.assertEqual(GeneratedImage.objects.count(), 3)
+
+
+class PredictDirTests(SimpleTestCase):
+    """`manage.py predict_dir` resuming from its CSV, with the stub model"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        for index in range(3):
+            with open(os.path.join(self.root, f'orbit{index}.txt'), 'w') as f:
+                f.write(synthetic_orbit_text(rows=200, seed=index))
+        self.output = os.path.join(self.root, 'predictions.csv')
+
+        registry = mock.patch('api.ml_predictor.REGISTRY', StubRegistry())
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def predict_dir(self, *args):
+        call_command('predict_dir', self.root, '--workers', '1', *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def read_rows(self):
+        with open(self.output, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    def test_resumes_after_truncated_row(self):
+        # orbit0 finished (with a marker class the stub never predicts for it), orbit1 cut off mid-row
+        with open(self.output, 'w', newline='', encoding='utf-8') as f:
+            f.write('File Name,Φ1,Φ2,Φ3,Φ4,Φ5\r\norbit0.txt,Libration,Libration,Libration,Libration,Libration\r\norbit1.txt,Circ')
+
+        self.predict_dir()
+
+        rows = self.read_rows()
+        self.assertEqual(rows[0], ['File Name', 'Φ1', 'Φ2', 'Φ3', 'Φ4', 'Φ5'])
+        self.assertEqual([row[0] for row in rows[1:]], ['orbit0.txt', 'orbit1.txt', 'orbit2.txt'])
+        self.assertEqual(rows[1][1:], ['Libration'] * 5)
+        self.assertTrue(all(len(row) == 6 for row in rows))
+
+    def test_refuses_csv_with_other_phi_columns(self):
+        self.predict_dir()
+        before = self.read_rows()
+
+        with self.assertRaisesMessage(CommandError, '--restart'):
+            self.predict_dir('--phis', '1,3')
+        self.assertEqual(self.read_rows(), before)
+
+        self.predict_dir('--phis', '1,3', '--restart')
+        self.assertEqual(self.read_rows()[0], ['File Name', 'Φ1', 'Φ3'])
+
+
+class ProfileTests(TestCase):
+    def setUp(self):
+        self.default_profiling = settings.REQUEST_PROFILING
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        profiling = override_settings(REQUEST_PROFILING={**settings.REQUEST_PROFILING, 'DIR': directory})
+        profiling.enable()
+        self.addCleanup(profiling.disable)
+
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+
+    def test_profiles_are_not_stored_under_media_root(self):
+        with override_settings(REQUEST_PROFILING=self.default_profiling):
+            directory = os.path.abspath(profile_dir())
+
+        self.assertFalse(directory.startswith(os.path.abspath(settings.MEDIA_ROOT) + os.sep))
+
+    def test_truncated_profile_is_not_found(self):
+        name = '20240501-101500-123456-upload_and_predict-2350ms.prof'
+        with open(os.path.join(profile_dir(), name), 'wb') as f:
+            f.write(b'\xfb\x01')
+
+        response = self.client.get(f'/api/profiles/{name}/')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class TableStampTests(TransactionTestCase):
+    """Version stamps bumped by the write signals (needs real commits)"""
+
+    def create_file(self, name='orbit.txt'):
+        return TextFile.objects.create(filename=name)
+
+    def test_one_bump_per_transaction(self):
+        with transaction.atomic():
+            for index in range(3):
+                self.create_file(f'orbit{index}.txt')
+
+        self.assertEqual(table_stamp([TextFile])[0], '1')
+
+    def test_bumps_after_rolled_back_write(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.create_file()
+                raise RuntimeError('roll back')
+        before = table_stamp([TextFile])[0]
+
+        self.create_file()
+        with transaction.atomic():
+            self.create_file()
+
+        self.assertEqual(before, '0')
+        self.assertEqual(table_stamp([TextFile])[0], '2')
+
+    def test_bumps_after_rolled_back_savepoint(self):
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.create_file()
+                    raise RuntimeError('roll back')
+            self.create_file()
+
+        self.assertEqual(table_stamp([TextFile])[0], '1')
+
+
+class FakeLoadRegistry(ModelRegistry):
+    """A registry that records loads instead of loading Keras models; version "broken" fails"""
+
+    def __init__(self, root):
+        super().__init__(root, poll_seconds=0)
+        self.loads = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def _load(self, version):
+        self.loads.append(version)
+        self.release.wait(5)
+        if version == 'broken':
+            raise OSError('corrupt model file')
+        return object()
+
+    def wait_idle(self):
+        deadline = time.monotonic() + 5
+        while self._loading is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        for version in ('broken', 'v1', 'v2'):
+            os.makedirs(os.path.join(root, version))
+            open(os.path.join(root, version, MODEL_FILENAME), 'w').close()
+        self.registry = FakeLoadRegistry(root)
+        self.registry.current()
+
+    def test_failed_version_is_not_retried_from_registry_file(self):
+        self.registry.set_configured_version('broken')
+        for _ in range(5):
+            self.registry.current()
+            self.registry.wait_idle()
+
+        self.assertEqual(self.registry.loads, ['v2', 'broken'])
+        self.assertEqual(self.registry.status()['active'], 'v2')
+        self.assertEqual(self.registry.status()['failed'], ['broken'])
+
+        # An explicit activation tries again
+        self.registry.activate('broken', persist=False)
+        self.registry.wait_idle()
+        self.assertEqual(self.registry.loads, ['v2', 'broken', 'broken'])
+
+    def test_concurrent_requests_start_one_swap(self):
+        self.registry.release.clear()
+        self.registry.set_configured_version('v1')
+
+        threads = [threading.Thread(target=self.registry.current) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.registry.release.set()
+        self.registry.wait_idle()
+
+        self.assertEqual(self.registry.loads, ['v2', 'v1'])
+        self.assertEqual(self.registry.status()['active'], 'v1')
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_satisfiable_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=3-100', 10), (3, 9))
+        self.assertEqual(parse_range('bytes=4-', 10), (4, 9))
+        self.assertEqual(parse_range('bytes=-5', 10), (5, 9))
+
+    def test_unsatisfiable_range(self):
+        self.assertIs(parse_range('bytes=10-', 10), False)
+
+    def test_invalid_range_is_ignored(self):
+        self.assertIsNone(parse_range('bytes=5-2', 10))
+        self.assertIsNone(parse_range('bytes=0-1,4-5', 10))
+
+
+class StartupImportBudgetTests(SimpleTestCase):
+    """What `manage.py check_import_budget` enforces, as part of the test suite"""
+
+    def test_startup_within_budget(self):
+        budget = settings.STARTUP_IMPORT_BUDGET
+        runs = [measure_startup() for _ in range(3)]
+
+        for modules in runs:
+            self.assertEqual(forbidden_imports(modules, budget['FORBIDDEN_MODULES']), [])
+        self.assertLessEqual(statistics.median(import_time_ms(modules) for modules in runs), budget['MAX_MS'])
@@ -11,14 +11,26 @@ urlpatterns = [
     # File upload endpoints
     path('upload/', views.upload_files, name='upload_files'),
     path('files/', views.list_files, name='list_files'),
+    path('files/bulk-delete/', views.bulk_delete_files, name='bulk_delete_files'),
     path('files/<int:file_id>/', views.delete_file, name='delete_file'),
+    path('files/<int:file_id>/images/', views.file_images, name='file_images'),
     
     # Image generation endpoints
     path('generate-image/', views.generate_image, name='generate_image'),
     path('images/', views.list_images, name='list_images'),
+    path('images/<int:image_id>/content/', views.image_content, name='image_content'),
     
     # Prediction endpoints
     path('images/<int:image_id>/predict/', views.predict_from_image, name='predict_from_image'),
     path('predictions/', views.list_predictions, name='list_predictions'),
+    path('predictions/stats/', views.prediction_stats, name='prediction_stats'),
     path('predictions/<int:prediction_id>/', views.get_prediction, name='get_prediction'),
+    
+    # Model registry endpoints
+    path('models/', views.list_models, name='list_models'),
+    path('models/activate/', views.activate_model, name='activate_model'),
+    
+    # Request profiling endpoints
+    path('profiles/', views.list_profiles, name='list_profiles'),
+    path('profiles/<str:profile_id>/', views.get_profile, name='get_profile'),
 ]
@@ -1,18 +1,26 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, parser_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from django.conf import settings
-from django.http import HttpResponse
-from .models import TextFile, GeneratedImage, Prediction
+from django.db.models import Avg, Count, Q
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import TextFile, GeneratedImage, Prediction, FilePrediction
 from .serializers import TextFileSerializer, GeneratedImageSerializer, PredictionSerializer
+from .exports import CATEGORIES, build_results_workbook, phi_columns_in, result_row
+from .phi import PHI_INDICES, parse_phi_indices
+from .storage import content_hash, delete_text_files
+from .caching import cached_list_response, table_changed
+from .media import load_stored_image, serve_media_file, store_phi_images, stored_phi_images
+from .profiling import profile_dir, profile_names, profile_summary, profiled
+import datetime
 import os
 import random
-import zipfile
 import io
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from PIL import Image, ImageDraw, ImageFont
 import tempfile
 
 
@@ -55,10 +63,14 @@ def list_files(request):
     """
     List all uploaded text files
     GET /api/files/
+    
+    Supports conditional GET (ETag / Last-Modified); unchanged lists return 304.
     """
-    files = TextFile.objects.all().order_by('-uploaded_at')
-    serializer = TextFileSerializer(files, many=True)
-    return Response(serializer.data)
+    def build():
+        files = TextFile.objects.all().order_by('-uploaded_at')
+        return TextFileSerializer(files, many=True).data
+    
+    return cached_list_response(request, 'files', [TextFile], build)
 
 
 @api_view(['DELETE'])
@@ -66,16 +78,98 @@ def delete_file(request, file_id):
     """
     Delete a specific text file
     DELETE /api/files/<id>/
+    
+    Generated images left without a source file, and their predictions,
+    are deleted with it.
     """
-    try:
-        text_file = TextFile.objects.get(id=file_id)
-        # Delete the actual file
-        if text_file.file and os.path.exists(text_file.file.path):
-            os.remove(text_file.file.path)
-        text_file.delete()
-        return Response({'message': 'File deleted successfully'}, status=status.HTTP_200_OK)
-    except TextFile.DoesNotExist:
+    if not TextFile.objects.filter(id=file_id).exists():
         return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    delete_text_files([file_id])
+    return Response({'message': 'File deleted successfully'}, status=status.HTTP_200_OK)
+
+
+def parse_id_list(value):
+    """
+    Validate a list of row IDs from a JSON body
+    
+    Args:
+        value: The "ids" / "file_ids" value of the request body
+    
+    Returns:
+        list: The IDs as integers
+    
+    Raises:
+        ValueError: If value is not a list of integers (or integer strings).
+            A string is refused rather than iterated per character ("12"
+            would mean IDs 1 and 2), and so are booleans.
+    """
+    if not isinstance(value, list) or any(isinstance(item, bool) for item in value):
+        raise ValueError('Expected a list of IDs')
+    try:
+        return [int(item) for item in value]
+    except (TypeError, ValueError):
+        raise ValueError('Expected a list of IDs')
+
+
+@api_view(['POST'])
+def bulk_delete_files(request):
+    """
+    Delete many text files at once
+    POST /api/files/bulk-delete/
+    Body: { "ids": [1, 2, 3] } and/or { "uploaded_before": "2024-05-01T00:00:00Z" }
+    
+    Both filters may be combined. Rows (with their generated images and
+    predictions) are deleted in one transaction; the files are removed from
+    disk in the background after the response is sent.
+    
+    Returns:
+    {
+        "deleted": 3,      (text files)
+        "images": 15,      (generated images without any remaining source file)
+        "message": "Deleted 3 files"
+    }
+    """
+    ids = request.data.get('ids')
+    uploaded_before = request.data.get('uploaded_before')
+    
+    if not ids and not uploaded_before:
+        # An empty "ids" list alone must not fall through to deleting everything
+        return Response(
+            {'error': 'Provide "ids" and/or "uploaded_before"'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    text_files = TextFile.objects.all()
+    
+    if ids is not None:
+        try:
+            ids = parse_id_list(ids)
+        except ValueError:
+            return Response({'error': '"ids" must be a list of file IDs'}, status=status.HTTP_400_BAD_REQUEST)
+        text_files = text_files.filter(id__in=ids)
+    
+    if uploaded_before:
+        cutoff = parse_datetime(str(uploaded_before))
+        if cutoff is None:
+            day = parse_date(str(uploaded_before))
+            cutoff = datetime.datetime.combine(day, datetime.time.min) if day else None
+        if cutoff is None:
+            return Response(
+                {'error': '"uploaded_before" must be an ISO 8601 date or datetime'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(cutoff):
+            cutoff = timezone.make_aware(cutoff)
+        text_files = text_files.filter(uploaded_at__lt=cutoff)
+    
+    result = delete_text_files(text_files, background=True)
+    
+    return Response({
+        'deleted': result['files'],
+        'images': result['images'],
+        'message': f"Deleted {result['files']} files"
+    }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -138,10 +232,73 @@ def list_images(request):
     """
     List all generated images
     GET /api/images/
+    
+    Supports conditional GET (ETag / Last-Modified); unchanged lists return 304.
+    """
+    def build():
+        images = GeneratedImage.objects.all().order_by('-created_at').prefetch_related('text_files')
+        return GeneratedImageSerializer(images, many=True).data
+    
+    return cached_list_response(request, 'images', [GeneratedImage, TextFile], build)
+
+
+@api_view(['GET', 'HEAD'])
+def image_content(request, image_id):
+    """
+    Serve a stored image file
+    GET /api/images/<id>/content/
+    GET /api/images/<id>/content/?thumb=1  (thumbnail)
+    
+    Cached by clients for a year; supports conditional GET and Range requests,
+    and HEAD for clients that read the length and Accept-Ranges first.
+    """
+    try:
+        generated_image = GeneratedImage.objects.only('image', 'thumbnail').get(id=image_id)
+    except GeneratedImage.DoesNotExist:
+        return Response(
+            {'error': 'Image not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    field = generated_image.thumbnail if request.GET.get('thumb') else generated_image.image
+    return serve_media_file(request, field.name)
+
+
+@api_view(['GET'])
+def file_images(request, file_id):
+    """
+    List the stored Φ images of a text file
+    GET /api/files/<id>/images/
+    
+    Returns:
+    [
+        {"id": 3, "phi_index": 1, "url": ".../api/images/3/content/", "thumbnail_url": "...?thumb=1"}
+    ]
     """
-    images = GeneratedImage.objects.all().order_by('-created_at')
-    serializer = GeneratedImageSerializer(images, many=True)
-    return Response(serializer.data)
+    if not TextFile.objects.filter(id=file_id).exists():
+        return Response({'error': 'File not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    images = (
+        GeneratedImage.objects.filter(text_files__id=file_id, phi_index__isnull=False)
+        .order_by('phi_index', '-created_at')
+        .values('id', 'phi_index', 'thumbnail')
+    )
+    
+    # Newest render per Φ column
+    latest = {}
+    for image in images:
+        latest.setdefault(image['phi_index'], image)
+    
+    results = []
+    for phi_index, image in sorted(latest.items()):
+        url = request.build_absolute_uri(reverse('image_content', args=[image['id']]))
+        results.append({
+            'id': image['id'],
+            'phi_index': phi_index,
+            'url': url,
+            'thumbnail_url': f'{url}?thumb=1' if image['thumbnail'] else url,
+        })
+    return Response(results)
 
 
 @api_view(['POST'])
@@ -180,6 +337,7 @@ def predict_from_image(request, image_id):
         # You should set actual prediction results here:
         # prediction.prediction_result = prediction_result
         # prediction.confidence = confidence_score
+        # prediction.model_version = model_version  (from ml_predictor.get_model())
         # prediction.save()
         
         serializer = PredictionSerializer(prediction)
@@ -201,10 +359,17 @@ def list_predictions(request):
     """
     List all predictions
     GET /api/predictions/
+    
+    Supports conditional GET (ETag / Last-Modified); unchanged lists return 304.
     """
-    predictions = Prediction.objects.all().order_by('-created_at')
-    serializer = PredictionSerializer(predictions, many=True)
-    return Response(serializer.data)
+    def build():
+        predictions = (
+            Prediction.objects.all().order_by('-created_at')
+            .select_related('image').prefetch_related('image__text_files')
+        )
+        return PredictionSerializer(predictions, many=True).data
+    
+    return cached_list_response(request, 'predictions', [Prediction, GeneratedImage, TextFile], build)
 
 
 @api_view(['GET'])
@@ -224,23 +389,103 @@ def get_prediction(request, prediction_id):
         )
 
 
+@api_view(['GET'])
+def prediction_stats(request):
+    """
+    Class distribution of the stored file predictions, counted in the database
+    GET /api/predictions/stats/
+    
+    Optional filters, combined with AND:
+        phi3=2             only files classified as Libration in Φ3 (any Φ; "phi3=1,2" for either class)
+        model_version=v2   only predictions made by this model version
+        file_hash=<sha256> only files with these contents
+    
+    Returns:
+    {
+        "total": 5000,
+        "phis": {
+            "phi1": {
+                "classes": {"Circulation": 1200, "Libration/Circulation": 300, "Libration": 3490},
+                "not_predicted": 10,
+                "mean_confidence": 0.93
+            },
+            ...
+        }
+    }
+    """
+    queryset = FilePrediction.objects.all()
+    filters = []
+    
+    for phi_index in PHI_INDICES:
+        value = request.query_params.get(f'phi{phi_index}')
+        if value is None:
+            continue
+        try:
+            classes = sorted({int(part) for part in value.split(',')})
+        except ValueError:
+            classes = None
+        if not classes or any(cls not in CATEGORIES for cls in classes):
+            return Response(
+                {'error': f'phi{phi_index} must be one or more of {list(CATEGORIES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = queryset.filter(**{f'phi{phi_index}__in': classes})
+        filters.append(f"phi{phi_index}={','.join(map(str, classes))}")
+    
+    for field in ('model_version', 'file_hash'):
+        value = request.query_params.get(field)
+        if value is not None:
+            queryset = queryset.filter(**{field: value})
+            filters.append(f'{field}={value[:100]}')
+    
+    def build():
+        # One aggregate query: a conditional count per Φ and class, plus mean confidences
+        aggregates = {'total': Count('id')}
+        for phi_index in PHI_INDICES:
+            for cls in CATEGORIES:
+                aggregates[f'phi{phi_index}_{cls}'] = Count('id', filter=Q(**{f'phi{phi_index}': cls}))
+            aggregates[f'conf{phi_index}'] = Avg(f'conf{phi_index}')
+        counts = queryset.aggregate(**aggregates)
+        
+        phis = {}
+        for phi_index in PHI_INDICES:
+            classes = {label: counts[f'phi{phi_index}_{cls}'] for cls, label in CATEGORIES.items()}
+            mean_confidence = counts[f'conf{phi_index}']
+            phis[f'phi{phi_index}'] = {
+                'classes': classes,
+                'not_predicted': counts['total'] - sum(classes.values()),
+                'mean_confidence': round(mean_confidence, 4) if mean_confidence is not None else None,
+            }
+        return {'total': counts['total'], 'phis': phis}
+    
+    return cached_list_response(request, 'prediction-stats:' + ';'.join(filters), [FilePrediction], build)
+
+
 @api_view(['POST'])
 @parser_classes([MultiPartParser, FormParser])
+@profiled('upload_and_predict')
 def upload_and_predict(request):
     """
     Upload files and immediately return predictions
     POST /api/upload-and-predict/
+    Optional form field "phis": Φ columns to classify, e.g. "1,3" (default: all five).
+    Only the requested columns are rendered and returned.
+    
+    With STORE_PHI_IMAGES the rendered images and thumbnails are kept and
+    listed by GET /api/files/<id>/images/.
     
     Returns predictions in format:
     {
         "predictions": [
             {
+                "id": 12,  (TextFile id, accepted by /api/download-results/)
                 "filename": "file1.txt",
-                "phi1": 0.85,
-                "phi2": 0.92,
-                "phi3": 0.78,
-                "phi4": 0.88,
-                "phi5": 0.95
+                "phi1": 0,
+                "conf1": 0.97,  (probability of the predicted class)
+                ...
+                "phi5": 2,
+                "conf5": 0.91,
+                "model_version": "v2"
             }
         ]
     }
@@ -255,13 +500,25 @@ def upload_and_predict(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    try:
+        phi_indices = parse_phi_indices(request.data.getlist('phis') or None)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # The ML stack (NumPy, Matplotlib, TensorFlow) is only loaded by the prediction paths
+    from .ml_predictor import predict_from_images
+    from .rendering import generate_scatter_plot_images
+    
     predictions = []
+    stored_predictions = []
     
     for file in files:
         # Validate file type
         if not file.name.endswith('.txt'):
             continue
         
+        file_hash = content_hash(file)
+        
         # Save file to database
         text_file = TextFile.objects.create(
             file=file,
@@ -269,30 +526,38 @@ def upload_and_predict(request):
         )
         
         try:
-            # Use ML model to predict from generated images
-            from .ml_predictor import predict_from_images
-            
             # Generate images and run predictions
             # Returns: {'phi1': 0, 'phi2': 1, 'phi3': 2, 'phi4': 0, 'phi5': 1}
-            ml_predictions = predict_from_images(text_file.file.path)
+            images = generate_scatter_plot_images(text_file.file.path, phi_indices)
+            ml_predictions = predict_from_images(text_file.file.path, phi_indices, images=images)
+            
+            if settings.STORE_PHI_IMAGES:
+                store_phi_images(text_file, images)
             
-            # Combine filename with predictions
+            # Combine file id and filename with predictions
             phi_values = {
+                'id': text_file.id,
                 'filename': file.name,
                 **ml_predictions  # Merge ML predictions
             }
             
             predictions.append(phi_values)
+            stored_predictions.append(FilePrediction(text_file=text_file, file_hash=file_hash, **ml_predictions))
             
         except Exception as e:
             # If prediction fails for a file, include error
             error_msg = str(e)
             print(f"Error processing {file.name}: {error_msg}")
             predictions.append({
+                'id': text_file.id,
                 'filename': file.name,
                 'error': error_msg
             })
     
+    # Keep the predictions so downloads can reuse them
+    FilePrediction.objects.bulk_create(stored_predictions)
+    table_changed(FilePrediction)
+    
     if not predictions:
         return Response(
             {'error': 'No valid text files provided'},
@@ -316,154 +581,101 @@ def upload_and_predict(request):
     }, status=status.HTTP_200_OK)
 
 
-def generate_scatter_plot_image(text_file_path, phi_index):
+def collect_download_rows(data):
     """
-    Generate scatter plot image from text file data
+    Resolve the files and predictions to export for download_results
+    
+    With "file_ids", all files are fetched in one query and their stored
+    predictions are used. The legacy "predictions" body is matched by
+    filename in one query as well (newest upload wins); stored predictions
+    take precedence over the classes sent by the client.
     
     Args:
-        text_file_path: Path to the text file with data
-        phi_index: Which Phi column to plot (1-5)
+        data: Request body
     
     Returns:
-        PIL Image object (224x224 pixels, white background)
-    """
-    import matplotlib
-    matplotlib.use('Agg')  # Use non-interactive backend
-    import matplotlib.pyplot as plt
-    import numpy as np
+        list: (TextFile or None, predictions dict) pairs in request order
     
-    # Configuration
-    DELIMITER = '\t'
-    DPI = 100
-    FIGURE_SIZE_INCHES = 2.24
+    Raises:
+        ValueError: If file_ids is not a list of integers
+    """
+    file_ids = data.get('file_ids')
     
-    try:
-        # 1. Load the data (Column 0 for X, Column phi_index for Y)
-        data = np.loadtxt(text_file_path, delimiter=DELIMITER)
-        x_data = data[:, 0]
-        y_data = data[:, phi_index]
-        
-        # 2. Create the Figure with a white background
-        fig = plt.figure(
-            figsize=(FIGURE_SIZE_INCHES, FIGURE_SIZE_INCHES),
-            frameon=False
+    if file_ids:
+        file_ids = parse_id_list(file_ids)
+        text_files = TextFile.objects.filter(id__in=file_ids).select_related('file_prediction')
+        by_id = {text_file.id: text_file for text_file in text_files}
+        entries = [(by_id[file_id], {}) for file_id in file_ids if file_id in by_id]
+    else:
+        predictions = data.get('predictions', [])
+        filenames = {pred.get('filename') for pred in predictions}
+        by_name = {}
+        text_files = (
+            TextFile.objects.filter(filename__in=filenames)
+            .select_related('file_prediction')
+            .order_by('uploaded_at', 'id')
         )
-        fig.set_facecolor('white')
-        
-        # 3. Create the Axes object to cover the entire figure area
-        ax = fig.add_axes([0, 0, 1, 1])
-        ax.set_axis_off()
-        ax.set_facecolor('white')
-        
-        # 4. Plot the data as a SCATTER of black points
-        ax.scatter(x_data, y_data, color='black', marker='o', s=1)
-        
-        # 5. Set limits to exact data range (no buffer/padding)
-        x_min, x_max = x_data.min(), x_data.max()
-        y_min, y_max = y_data.min(), y_data.max()
-        ax.set_xlim(x_min, x_max)
-        ax.set_ylim(y_min, y_max)
-        
-        # 6. Save to BytesIO buffer
-        buf = io.BytesIO()
-        plt.savefig(
-            buf,
-            format='png',
-            dpi=DPI,
-            bbox_inches='tight',
-            pad_inches=0,
-            facecolor='white',
-            edgecolor='white',
-            transparent=False
-        )
-        plt.close(fig)
-        buf.seek(0)
-        
-        # 7. Convert to RGB and ensure white background
-        img = Image.open(buf)
-        
-        # Create a white background image
-        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-            img = img.convert('RGBA')
-            white_bg = Image.new('RGB', img.size, (255, 255, 255))
-            white_bg.paste(img, mask=img.split()[3])
-        else:
-            white_bg = img.convert('RGB')
-        
-        # Resize to 224x224 without adding white edges
-        resized_img = white_bg.resize((224, 224), Image.Resampling.LANCZOS)
-        
-        return resized_img
-        
-    except Exception as e:
-        print(f"Error generating scatter plot for Phi {phi_index}: {e}")
-        # Return a blank white image on error
-        return Image.new('RGB', (224, 224), color=(255, 255, 255))
+        for text_file in text_files:
+            by_name[text_file.filename] = text_file
+        entries = [(by_name.get(pred.get('filename')), pred) for pred in predictions]
+    
+    rows = []
+    for text_file, pred in entries:
+        if text_file is not None:
+            try:
+                stored = text_file.file_prediction.as_dict()
+            except FilePrediction.DoesNotExist:
+                stored = {key: value for key, value in pred.items() if key.startswith('phi')}
+            pred = {'filename': text_file.filename, **stored}
+        rows.append((text_file, pred))
+    return rows
 
 
 @api_view(['POST'])
+@profiled('download_results')
 def download_results(request):
     """
     Download results as a zip file containing:
     - images/ folder with generated images
     - results.xlsx with prediction table
     
+    Only the Φ columns present in the predictions are exported. Images kept
+    by STORE_PHI_IMAGES are reused; the others are rendered again.
+    
     POST /api/download-results/
-    Body: { "predictions": [...] }
+    Body: { "file_ids": [1, 2, 3] }
+    Legacy body: { "predictions": [...] } (matched to files by filename)
     """
-    predictions = request.data.get('predictions', [])
+    try:
+        rows = collect_download_rows(request.data)
+    except (TypeError, ValueError):
+        return Response(
+            {'error': 'file_ids must be a list of integers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    if not predictions:
+    if not rows:
         return Response(
             {'error': 'No predictions provided'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    import zipfile
+    from .rendering import generate_scatter_plot_images
+    
+    predictions = [pred for text_file, pred in rows]
+    phi_indices = phi_columns_in(predictions)
+    stored_images = stored_phi_images([text_file.id for text_file, pred in rows if text_file], phi_indices)
+    
     # Create a BytesIO buffer for the zip file
     zip_buffer = io.BytesIO()
     
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
         # Create Excel file
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Prediction Results"
-        
-        # Style the header
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        
-        # Write headers
-        headers = ['File Name', 'Φ1', 'Φ2', 'Φ3', 'Φ4', 'Φ5']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Category mapping
-        categories = {0: 'Circulation', 1: 'Libration/Circulation', 2: 'Libration'}
-        
-        # Write data
-        for row_idx, pred in enumerate(predictions, 2):
-            ws.cell(row=row_idx, column=1, value=pred.get('filename', ''))
-            ws.cell(row=row_idx, column=2, value=categories.get(pred.get('phi1'), str(pred.get('phi1'))))
-            ws.cell(row=row_idx, column=3, value=categories.get(pred.get('phi2'), str(pred.get('phi2'))))
-            ws.cell(row=row_idx, column=4, value=categories.get(pred.get('phi3'), str(pred.get('phi3'))))
-            ws.cell(row=row_idx, column=5, value=categories.get(pred.get('phi4'), str(pred.get('phi4'))))
-            ws.cell(row=row_idx, column=6, value=categories.get(pred.get('phi5'), str(pred.get('phi5'))))
-        
-        # Adjust column widths
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column].width = adjusted_width
+        wb = build_results_workbook(
+            (result_row(pred, phi_indices) for pred in predictions),
+            phi_indices
+        )
         
         # Save Excel to buffer
         excel_buffer = io.BytesIO()
@@ -473,13 +685,11 @@ def download_results(request):
         # Add Excel file to zip
         zip_file.writestr('results.xlsx', excel_buffer.read())
         
-        # Generate and add images (5 images per file, one for each Φ)
-        for pred in predictions:
+        # Generate and add images (one per exported Φ column)
+        for text_file, pred in rows:
             filename = pred.get('filename', 'unknown')
             
-            # Find the uploaded text file
             try:
-                text_file = TextFile.objects.filter(filename=filename).first()
                 if not text_file or not text_file.file:
                     print(f"Text file not found for {filename}")
                     continue
@@ -487,12 +697,21 @@ def download_results(request):
                 text_file_path = text_file.file.path
                 base_filename = filename.replace('.txt', '')
                 
-                # Generate 5 scatter plot images (one for each Φ column)
-                for phi_index in range(1, 6):
+                # Reuse stored images, and render the missing ones reading the text file once
+                images = {}
+                for phi_index in phi_indices:
+                    name = stored_images.get((text_file.id, phi_index))
+                    if name:
+                        try:
+                            images[phi_index] = load_stored_image(name)
+                        except OSError as e:
+                            print(f"Stored Φ{phi_index} image for {filename} unreadable, rendering it: {e}")
+                missing = [phi_index for phi_index in phi_indices if phi_index not in images]
+                if missing:
+                    images.update(generate_scatter_plot_images(text_file_path, missing))
+                
+                for phi_index, img in sorted(images.items()):
                     try:
-                        # Generate scatter plot image
-                        img = generate_scatter_plot_image(text_file_path, phi_index)
-                        
                         # Save image to buffer as JPEG
                         img_buffer = io.BytesIO()
                         img.save(img_buffer, format='JPEG', quality=95)
@@ -515,3 +734,126 @@ def download_results(request):
     response['Content-Disposition'] = 'attachment; filename="prediction_results.zip"'
     
     return response
+
+
+@api_view(['GET'])
+def list_models(request):
+    """
+    Show the model registry
+    GET /api/models/
+    
+    Returns:
+    {
+        "active": "v2",        (version serving requests in this process)
+        "configured": "v2",    (version selected in registry.json)
+        "loading": null,       (version being loaded in the background)
+        "failed": [],          (versions that failed to load, not retried from registry.json for a while)
+        "versions": ["best_model_all", "v1", "v2"]
+    }
+    """
+    from .ml_predictor import REGISTRY
+    
+    return Response(REGISTRY.status())
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def activate_model(request):
+    """
+    Switch to another model version without downtime
+    POST /api/models/activate/
+    Body: { "version": "v2" }
+    
+    The version is loaded and warmed up in the background; requests keep
+    using the current version until it is ready. Other processes follow
+    through registry.json.
+    """
+    from .ml_predictor import REGISTRY
+    
+    version = request.data.get('version')
+    if not version:
+        return Response({'error': 'No version provided'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        REGISTRY.activate(str(version))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'message': f'Loading model version {version}',
+        **REGISTRY.status()
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def list_profiles(request):
+    """
+    List stored request profiles, newest first
+    GET /api/profiles/?limit=20&top=10
+    
+    Profiles are captured for upload-and-predict and download-results when a
+    staff user adds ?profile=1 (or an "X-Profile: 1" header), and for a
+    sample of all requests with REQUEST_PROFILING['SAMPLE_RATE'].
+    
+    Returns:
+    [
+        {
+            "id": "20240501-101500-123456-upload_and_predict-2350ms.prof",
+            "view": "upload_and_predict",
+            "duration_ms": 2350,
+            "created_at": "...",
+            "total_calls": 812345,
+            "functions": [
+                {"function": "loadtxt (npyio.py:1080)", "calls": 1, "own_seconds": 0.01, "cumulative_seconds": 0.42},
+                ...
+            ]   (top functions by cumulative time)
+        }
+    ]
+    """
+    try:
+        limit = int(request.query_params.get('limit', 20))
+        top = int(request.query_params.get('top', 10))
+    except ValueError:
+        return Response({'error': 'limit and top must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    summaries = []
+    for name in sorted(profile_names(), reverse=True)[:limit]:
+        try:
+            summaries.append(profile_summary(name, top))
+        except (FileNotFoundError, ValueError, EOFError) as e:
+            # Pruned meanwhile, or written by an interrupted request
+            print(f"Skipping profile {name}: {e}")
+    
+    return Response(summaries)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_profile(request, profile_id):
+    """
+    Show one stored profile
+    GET /api/profiles/<id>/?top=50
+    GET /api/profiles/<id>/?raw=1  (the .prof file, for snakeviz or pstats)
+    """
+    try:
+        top = int(request.query_params.get('top', 50))
+    except ValueError:
+        return Response({'error': 'top must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        summary = profile_summary(profile_id, top)
+    except FileNotFoundError:
+        return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+    except (ValueError, EOFError):
+        # Truncated or corrupt file, e.g. a profile still being written
+        return Response({'error': 'Profile is unreadable'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.query_params.get('raw'):
+        return FileResponse(
+            open(os.path.join(profile_dir(), profile_id), 'rb'),
+            as_attachment=True,
+            filename=profile_id
+        )
+    
+    return Response(summary)
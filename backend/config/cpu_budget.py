@@ -0,0 +1,115 @@
+"""
+CPU thread budget
+Splits the usable cores between web workers, TensorFlow intra/inter-op pools,
+BLAS threads and render workers.
+
+The split is exported through the environment variables the native libraries
+read when they start, so apply_cpu_budget() must run before NumPy or
+TensorFlow are imported (settings.py calls it). Variables already set in the
+environment win, which lets operators and the autotune command override it.
+"""
+import os
+
+# Thread pool sizes read by the BLAS / OpenMP runtimes NumPy and TensorFlow link against
+BLAS_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+)
+TF_INTRA_OP_ENV_VAR = 'TF_NUM_INTRAOP_THREADS'
+TF_INTER_OP_ENV_VAR = 'TF_NUM_INTEROP_THREADS'
+RENDER_WORKERS_ENV_VAR = 'RENDER_WORKERS'
+
+
+def available_cores():
+    """
+    Cores this process may actually use
+
+    Counts the CPU affinity mask rather than every core of the host, and
+    caps it by a cgroup v2 CPU quota (containers limited with --cpus).
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # No affinity API (macOS, Windows)
+        cores = os.cpu_count() or 1
+
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cores = min(cores, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def compute_budget(config):
+    """
+    Derive thread counts from a CPU_BUDGET config
+
+    Args:
+        config: dict with TOTAL_CORES, WEB_WORKERS, TF_INTRA_OP_THREADS,
+            TF_INTER_OP_THREADS, BLAS_THREADS, RENDER_WORKERS; None or a
+            missing key means "derive from the core count"
+
+    Returns:
+        dict: The same keys with concrete integers
+    """
+    total_cores = config.get('TOTAL_CORES') or available_cores()
+    web_workers = max(1, config.get('WEB_WORKERS') or 1)
+    cores_per_worker = max(1, total_cores // web_workers)
+
+    # predict_dir renders the next batch in RENDER_WORKERS processes while the
+    # model runs on the current one, so the two split each worker's share
+    # rather than both taking all of it
+    render_workers = config.get('RENDER_WORKERS') or max(1, cores_per_worker // 2)
+
+    return {
+        'TOTAL_CORES': total_cores,
+        'WEB_WORKERS': web_workers,
+        # TensorFlow gets the rest of each worker's share for its kernels...
+        'TF_INTRA_OP_THREADS': config.get('TF_INTRA_OP_THREADS') or max(1, cores_per_worker - render_workers),
+        # ...and only a couple of threads to schedule independent ops
+        'TF_INTER_OP_THREADS': config.get('TF_INTER_OP_THREADS') or min(2, cores_per_worker),
+        # NumPy work here is elementwise; a BLAS pool per worker only competes with TensorFlow
+        'BLAS_THREADS': config.get('BLAS_THREADS') or 1,
+        'RENDER_WORKERS': render_workers,
+    }
+
+
+def apply_cpu_budget(config):
+    """
+    Export the thread budget to the environment
+
+    Args:
+        config: CPU_BUDGET dict from settings
+
+    Returns:
+        dict: The effective budget, including any values overridden by
+        environment variables that were already set
+    """
+    budget = compute_budget(config)
+
+    for var in BLAS_ENV_VARS:
+        os.environ.setdefault(var, str(budget['BLAS_THREADS']))
+    os.environ.setdefault(TF_INTRA_OP_ENV_VAR, str(budget['TF_INTRA_OP_THREADS']))
+    os.environ.setdefault(TF_INTER_OP_ENV_VAR, str(budget['TF_INTER_OP_THREADS']))
+    os.environ.setdefault(RENDER_WORKERS_ENV_VAR, str(budget['RENDER_WORKERS']))
+
+    budget['BLAS_THREADS'] = int(os.environ['OMP_NUM_THREADS'])
+    budget['TF_INTRA_OP_THREADS'] = int(os.environ[TF_INTRA_OP_ENV_VAR])
+    budget['TF_INTER_OP_THREADS'] = int(os.environ[TF_INTER_OP_ENV_VAR])
+    budget['RENDER_WORKERS'] = int(os.environ[RENDER_WORKERS_ENV_VAR])
+    return budget
+
+
+def budget_env(budget):
+    """Environment variables that pin a process to the given budget"""
+    env = {var: str(budget['BLAS_THREADS']) for var in BLAS_ENV_VARS}
+    env[TF_INTRA_OP_ENV_VAR] = str(budget['TF_INTRA_OP_THREADS'])
+    env[TF_INTER_OP_ENV_VAR] = str(budget['TF_INTER_OP_THREADS'])
+    env[RENDER_WORKERS_ENV_VAR] = str(budget['RENDER_WORKERS'])
+    return env
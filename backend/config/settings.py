@@ -5,6 +5,8 @@ Django settings for the project.
 from pathlib import Path
 import os
 
+from .cpu_budget import apply_cpu_budget
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -64,7 +66,7 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -96,7 +98,7 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_ROOT = Path(os.environ.get('DJANGO_MEDIA_ROOT', BASE_DIR / 'media'))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -118,6 +120,70 @@ REST_FRAMEWORK = {
     ],
 }
 
+# CPU thread budget
+# Splits the usable cores (CPU affinity, capped by a cgroup quota) between web worker
+# processes, TensorFlow intra/inter-op pools, BLAS threads and render workers; TensorFlow
+# and render workers share each worker's cores. None derives a value from the core count.
+# Applied here so it takes effect before NumPy or TensorFlow are imported;
+# environment variables (OMP_NUM_THREADS, TF_NUM_INTRAOP_THREADS, ...) still win.
+# `python manage.py autotune_threads` benchmarks splits and recommends one.
+CPU_BUDGET = {
+    'TOTAL_CORES': None,
+    'WEB_WORKERS': int(os.environ.get('WEB_CONCURRENCY', 1)),  # Set to the Gunicorn worker count
+    'TF_INTRA_OP_THREADS': None,
+    'TF_INTER_OP_THREADS': None,
+    'BLAS_THREADS': None,
+    'RENDER_WORKERS': None,
+}
+CPU_THREADS = apply_cpu_budget(CPU_BUDGET)
+
+# Model registry (versioned models in MODEL_REGISTRY_DIR/<version>/model.keras,
+# active version in MODEL_REGISTRY_DIR/registry.json; see api/model_registry.py)
+MODEL_REGISTRY_DIR = BASE_DIR / 'models'
+MODEL_REGISTRY_POLL_SECONDS = 5  # How often each process checks registry.json for a new active version
+# Serve a stub model with the same inputs and outputs instead (no TensorFlow needed);
+# used by `python manage.py loadtest`. The delay simulates inference time per file.
+ML_STUB_MODEL = os.environ.get('ML_STUB_MODEL') == '1'
+ML_STUB_MODEL_DELAY_MS = float(os.environ.get('ML_STUB_MODEL_DELAY_MS', 0))
+# Import TensorFlow and load the model when a web worker starts, instead of on its first
+# prediction. Leave off for workers that only serve lists and deletes (smaller, faster to spawn).
+ML_PRELOAD = os.environ.get('ML_PRELOAD') == '1'
+
+# Startup import budget, checked by `python manage.py check_import_budget`
+# (NumPy, Pillow, Matplotlib, openpyxl and TensorFlow are only imported by the ML paths)
+STARTUP_IMPORT_BUDGET = {
+    'MAX_MS': 600,  # Import time of config.wsgi + config.urls, median of several cold starts
+    'FORBIDDEN_MODULES': ['tensorflow', 'keras', 'numpy', 'PIL', 'matplotlib', 'openpyxl'],
+}
+
+# Stored Φ images
+STORE_PHI_IMAGES = True  # Keep the images rendered by upload-and-predict, served by /api/images/<id>/content/
+THUMBNAIL_SIZE = 64  # Longest side of the pre-generated thumbnails, in pixels
+# Let a front proxy send image bodies: None, 'x-sendfile' (Apache/lighttpd) or
+# 'x-accel-redirect' (nginx; map MEDIA_ACCEL_REDIRECT_PREFIX to MEDIA_ROOT in an internal location)
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Request profiling of upload-and-predict and download-results (see api/profiling.py)
+# Staff users profile a single request with ?profile=1 or an "X-Profile: 1" header;
+# SAMPLE_RATE also profiles that fraction of all requests. Listed by /api/profiles/.
+REQUEST_PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),  # e.g. 0.01 for 1% of requests
+    # Kept outside MEDIA_ROOT, which is served publicly in DEBUG; only /api/profiles/ (staff) exposes them
+    'DIR': Path(os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles')),
+    'KEEP': 200,  # Newest profiles kept
+}
+
+# Storage retention for uploads and generated images
+# Enforced by `python manage.py sweep_storage`, and periodically in the web
+# process when SWEEP_INTERVAL_SECONDS is set. None disables a limit.
+STORAGE_RETENTION = {
+    'MAX_AGE_DAYS': None,  # Delete uploads older than this
+    'MAX_BYTES': None,  # Then delete the oldest uploads until media usage is below this
+    'BATCH_SIZE': 500,  # Text files deleted per transaction
+    'SWEEP_INTERVAL_SECONDS': None,  # e.g. 3600 to sweep hourly in the background
+}
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
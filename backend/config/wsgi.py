@@ -9,3 +9,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Periodic storage sweep (no-op unless STORAGE_RETENTION['SWEEP_INTERVAL_SECONDS'] is set)
+from api.storage import start_background_sweeper  # noqa: E402
+
+start_background_sweeper()
+
+# Load the ML stack and model ahead of the first prediction (no-op unless ML_PRELOAD is set)
+from api.model_registry import start_background_preload  # noqa: E402
+
+start_background_preload()
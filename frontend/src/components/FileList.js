@@ -1,11 +1,12 @@
 import React, { useEffect, useState } from 'react';
-import { FileText, Trash2, RefreshCw } from 'lucide-react';
-import { listFiles, deleteFile } from '../services/api';
+import { FileText, Trash2, RefreshCw, Image as ImageIcon } from 'lucide-react';
+import { listFiles, deleteFile, bulkDeleteFiles, getFileImages } from '../services/api';
 import './FileList.css';
 
 const FileList = ({ files, onFilesUpdate }) => {
   const [allFiles, setAllFiles] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [plots, setPlots] = useState({});
 
   const fetchFiles = async () => {
     setLoading(true);
@@ -42,6 +43,36 @@ const FileList = ({ files, onFilesUpdate }) => {
     }
   };
 
+  const handleDeleteAll = async () => {
+    if (window.confirm(`Are you sure you want to delete all ${allFiles.length} files?`)) {
+      try {
+        // One request; the server removes the files from disk in the background
+        await bulkDeleteFiles({ ids: allFiles.map(f => f.id) });
+        setAllFiles([]);
+        setPlots({});
+        onFilesUpdate([]);
+      } catch (error) {
+        console.error('Error deleting files:', error);
+        alert('Failed to delete files');
+      }
+    }
+  };
+
+  const togglePlots = async (fileId) => {
+    if (plots[fileId]) {
+      const { [fileId]: _, ...rest } = plots;
+      setPlots(rest);
+      return;
+    }
+    try {
+      // Stored images are served as-is, nothing is re-rendered
+      const images = await getFileImages(fileId);
+      setPlots({ ...plots, [fileId]: images });
+    } catch (error) {
+      console.error('Error fetching plots:', error);
+    }
+  };
+
   if (loading) {
     return <div className="loading">Loading files...</div>;
   }
@@ -50,10 +81,18 @@ const FileList = ({ files, onFilesUpdate }) => {
     <div className="file-list-container">
       <div className="file-list-header">
         <h2>📁 Uploaded Files ({allFiles.length})</h2>
-        <button className="refresh-btn" onClick={fetchFiles}>
-          <RefreshCw size={20} />
-          Refresh
-        </button>
+        <div className="file-list-actions">
+          {allFiles.length > 0 && (
+            <button className="delete-all-btn" onClick={handleDeleteAll}>
+              <Trash2 size={20} />
+              Delete All
+            </button>
+          )}
+          <button className="refresh-btn" onClick={fetchFiles}>
+            <RefreshCw size={20} />
+            Refresh
+          </button>
+        </div>
       </div>
 
       {allFiles.length === 0 ? (
@@ -74,7 +113,27 @@ const FileList = ({ files, onFilesUpdate }) => {
                 <span className="file-date">
                   {new Date(file.uploaded_at).toLocaleDateString()}
                 </span>
+                {plots[file.id] && (
+                  <div className="file-plots">
+                    {plots[file.id].length === 0 ? (
+                      <span className="file-date">No stored plots</span>
+                    ) : (
+                      plots[file.id].map((image) => (
+                        <a key={image.id} href={image.url} target="_blank" rel="noreferrer" title={`Φ${image.phi_index}`}>
+                          <img src={image.thumbnail_url} alt={`Φ${image.phi_index}`} loading="lazy" />
+                        </a>
+                      ))
+                    )}
+                  </div>
+                )}
               </div>
+              <button
+                className="plots-btn"
+                onClick={() => togglePlots(file.id)}
+                title="Show plots"
+              >
+                <ImageIcon size={18} />
+              </button>
               <button 
                 className="delete-btn"
                 onClick={() => handleDelete(file.id)}
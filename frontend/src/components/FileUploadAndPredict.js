@@ -223,6 +223,11 @@ const FileUploadAndPredict = ({ language = 'EN' }) => {
     return t.categories[value] || value;
   };
 
+  // Only show the Φ columns the backend returned
+  const phiColumns = [1, 2, 3, 4, 5].filter(phiIndex =>
+    predictions.some(pred => pred[`phi${phiIndex}`] !== undefined)
+  );
+
   const handleDownload = async () => {
     if (predictions.length === 0) {
       setMessage({ type: 'error', text: t.noResults });
@@ -347,22 +352,18 @@ const FileUploadAndPredict = ({ language = 'EN' }) => {
               <thead>
                 <tr>
                   <th>{t.fileName}</th>
-                  <th>Ф1</th>
-                  <th>Ф2</th>
-                  <th>Ф3</th>
-                  <th>Ф4</th>
-                  <th>Ф5</th>
+                  {phiColumns.map(phiIndex => (
+                    <th key={phiIndex}>Ф{phiIndex}</th>
+                  ))}
                 </tr>
               </thead>
               <tbody>
                 {predictions.map((pred, index) => (
                   <tr key={index}>
                     <td className="filename-cell">{pred.filename}</td>
-                    <td>{getCategoryLabel(pred.phi1)}</td>
-                    <td>{getCategoryLabel(pred.phi2)}</td>
-                    <td>{getCategoryLabel(pred.phi3)}</td>
-                    <td>{getCategoryLabel(pred.phi4)}</td>
-                    <td>{getCategoryLabel(pred.phi5)}</td>
+                    {phiColumns.map(phiIndex => (
+                      <td key={phiIndex}>{getCategoryLabel(pred[`phi${phiIndex}`])}</td>
+                    ))}
                   </tr>
                 ))}
               </tbody>
@@ -10,11 +10,15 @@ const api = axios.create({
 });
 
 // Combined upload and predict endpoint
-export const uploadAndPredict = async (files) => {
+// phis: optional list of Φ indices to classify, e.g. [1, 3] (default: all five)
+export const uploadAndPredict = async (files, phis = null) => {
   const formData = new FormData();
   files.forEach(file => {
     formData.append('files', file);
   });
+  if (phis && phis.length > 0) {
+    formData.append('phis', phis.join(','));
+  }
   
   const response = await api.post('/upload-and-predict/', formData, {
     headers: {
@@ -25,9 +29,12 @@ export const uploadAndPredict = async (files) => {
 };
 
 // Download results as zip file
+// Sends the uploaded file IDs so the server exports its stored predictions
 export const downloadResults = async (predictions) => {
+  const fileIds = predictions.map(pred => pred.id).filter(id => id !== undefined);
+  const body = fileIds.length === predictions.length ? { file_ids: fileIds } : { predictions };
   const response = await api.post('/download-results/', 
-    { predictions },
+    body,
     { 
       responseType: 'blob',
       headers: {
@@ -72,6 +79,21 @@ export const deleteFile = async (fileId) => {
   return response.data;
 };
 
+// Delete many files in one request: { ids: [...] } and/or { uploadedBefore: ISO date }
+export const bulkDeleteFiles = async ({ ids, uploadedBefore } = {}) => {
+  const body = {};
+  if (ids) body.ids = ids;
+  if (uploadedBefore) body.uploaded_before = uploadedBefore;
+  const response = await api.post('/files/bulk-delete/', body);
+  return response.data;
+};
+
+// Stored Φ images of a file: [{ id, phi_index, url, thumbnail_url }]
+export const getFileImages = async (fileId) => {
+  const response = await api.get(`/files/${fileId}/images/`);
+  return response.data;
+};
+
 // Image generation endpoints
 export const generateImage = async (fileIds) => {
   const response = await api.post('/generate-image/', { file_ids: fileIds });
@@ -94,6 +116,12 @@ export const listPredictions = async () => {
   return response.data;
 };
 
+// Class counts per Φ over stored predictions; filters e.g. { phi3: 2, model_version: 'v2' }
+export const getPredictionStats = async (filters = {}) => {
+  const response = await api.get('/predictions/stats/', { params: filters });
+  return response.data;
+};
+
 export const getPrediction = async (predictionId) => {
   const response = await api.get(`/predictions/${predictionId}/`);
   return response.data;